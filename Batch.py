@@ -0,0 +1,160 @@
+"""
+Generate recommendations from several templates in one process
+Usage: Edit the database.json5 of each template, then run this script with the templates to generate,
+e.g. python Batch.py LED "Repair Leaks", or without arguments to run every template.
+Libraries and Utility.json5 are loaded once and shared by all templates.
+Use --jobs N to run templates in N worker processes, which requires --overwrite since workers can't prompt.
+With --overwrite, every template must have its own REC number.
+"""
+
+import os, sys, glob, runpy, traceback, argparse, concurrent.futures
+import Shared.IAC
+
+# Repository root
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Libraries used by the templates
+LIBRARIES = ['json5', 'numpy', 'num2words', 'docx', 'docxcompose.composer', 'easydict', 'python_docx_replace']
+
+def preload():
+    """
+    Import the libraries used by the templates once, before the first template and the worker processes
+    """
+    import importlib
+    for name in LIBRARIES:
+        importlib.import_module(name)
+
+def discover() -> list:
+    """
+    Find every template folder with an automate.py and a database.json5
+    :return: Sorted list of templates as "Category/Name"
+    """
+    templates = []
+    for script in glob.glob(os.path.join(ROOT, '*', '*', 'automate.py')):
+        folder = os.path.dirname(script)
+        if os.path.isfile(os.path.join(folder, 'database.json5')):
+            templates.append(os.path.relpath(folder, ROOT).replace(os.sep, '/'))
+    return sorted(templates)
+
+def select(templates: list, names: list) -> list:
+    """
+    Match template names given on the command line, case insensitive
+    :param templates: List of templates as "Category/Name"
+    :param names: List of "Category/Name" or "Name"
+    :return: List of selected templates in the given order
+    """
+    selected = []
+    for name in names:
+        matches = [t for t in templates if name.lower().strip('/') in (t.lower(), t.split('/')[1].lower())]
+        if len(matches) == 0:
+            raise Exception("Template " + name + " not found. Use --list to show all templates.")
+        if len(matches) > 1:
+            raise Exception("Template " + name + " is ambiguous: " + ", ".join(matches))
+        if matches[0] not in selected:
+            selected.append(matches[0])
+    return selected
+
+def output_file(template: str) -> str:
+    """
+    Recommendation document a template will write, from its database and automate.py
+    :param template: Template as "Category/Name"
+    :return: Filename as string
+    """
+    import json5
+    folder = os.path.join(ROOT, *template.split('/'))
+    with open(os.path.join(folder, 'database.json5'), 'r') as f:
+        rec = str(json5.load(f)['REC'])
+    with open(os.path.join(folder, 'automate.py'), 'r') as f:
+        add = 'add=True' in f.read()
+    return Shared.IAC.rec_filename(rec, add)
+
+def check_outputs(templates: list):
+    """
+    Stop if several templates would write the same recommendation document
+    :param templates: List of templates as "Category/Name"
+    """
+    outputs = {}
+    for template in templates:
+        outputs.setdefault(output_file(template), []).append(template)
+    duplicates = {filename: names for filename, names in outputs.items() if len(names) > 1}
+    if duplicates:
+        raise Exception("Templates would overwrite each other, please change REC in their databases:\n" +
+                        "\n".join(filename + ": " + ", ".join(names) for filename, names in duplicates.items()))
+
+def run_template(template: str):
+    """
+    Run the automate.py of one template in this process
+    :param template: Template as "Category/Name"
+    :return: Error traceback as string, None if successful
+    """
+    folder = os.path.join(ROOT, *template.split('/'))
+    cwd = os.getcwd()
+    path = list(sys.path)
+    modules = set(sys.modules)
+    print("== " + template)
+    # Templates use paths relative to their own folder and may import local modules
+    os.chdir(folder)
+    sys.path.insert(0, folder)
+    try:
+        runpy.run_path('automate.py', run_name='__main__')
+        return None
+    except (Exception, SystemExit):
+        return traceback.format_exc()
+    finally:
+        os.chdir(cwd)
+        sys.path[:] = path
+        # Forget template local modules such as AFR.py
+        for name in set(sys.modules) - modules:
+            file = getattr(sys.modules[name], '__file__', None) or ''
+            if os.path.abspath(file).startswith(folder + os.sep):
+                del sys.modules[name]
+
+def init_worker(overwrite: bool):
+    """
+    Set up a worker process
+    :param overwrite: Overwrite existing recommendation documents, bool
+    """
+    Shared.IAC.OVERWRITE = overwrite
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate recommendations from several templates in one process")
+    parser.add_argument('templates', nargs='*', help='templates to run as "Category/Name" or "Name", default is all')
+    parser.add_argument('-l', '--list', action='store_true', help="list all templates and exit")
+    parser.add_argument('-o', '--overwrite', action='store_true', help="overwrite existing recommendation documents without asking")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+    if args.jobs > 1 and not args.overwrite:
+        parser.error("--jobs requires --overwrite")
+
+    templates = discover()
+    if args.list:
+        print("\n".join(templates))
+        return
+    if args.templates:
+        templates = select(templates, args.templates)
+    # Without --overwrite an existing document is renamed at the prompt
+    if args.overwrite:
+        check_outputs(templates)
+
+    preload()
+    errors = {}
+    if args.jobs > 1 and len(templates) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(args.overwrite,)) as executor:
+            for template, error in zip(templates, executor.map(run_template, templates)):
+                if error is not None:
+                    errors[template] = error
+    else:
+        init_worker(args.overwrite)
+        for template in templates:
+            error = run_template(template)
+            if error is not None:
+                errors[template] = error
+
+    for template, error in errors.items():
+        print("== " + template + " failed")
+        print(error)
+    print(str(len(templates) - len(errors)) + " of " + str(len(templates)) + " templates finished.")
+    if errors:
+        raise Exception("Failed templates: " + ", ".join(errors))
+
+if __name__ == '__main__':
+    main()
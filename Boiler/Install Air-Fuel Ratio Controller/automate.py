@@ -2,53 +2,67 @@
 This script is used to generate the IAC recommendation for Recover Exhaust Gas Heat.
 """
 
-import json5, sys, os
-from docx import Document
-from easydict import EasyDict
-from python_docx_replace import docx_replace, docx_blocks
-sys.path.append(os.path.join('..', '..')) 
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
+from copy import deepcopy
 import AFR
 
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
-
-# Calculations
-iac.OH = int(iac.HR * iac.DY * iac.WK)
-iac.CAH = round(AFR.AFR(iac.CAT, iac.FGT, iac.O2),2)
-# Proposed condition is 2% O2
-iac.PAH = round(AFR.AFR(iac.CAT, iac.FGT, 2),2)
-iac.SAV = round((iac.PAH - iac.CAH)/iac.PAH * 100, 2)
-iac.IC = round(iac.LABOR + iac.PARTS)
-iac.NGS = round(iac.SIZE * iac.OH * (iac.LF/100) * (iac.SAV/100))
-iac.ACS = round(iac.NGS * iac.NGC)
-
-# Rebate
-iac = rebate(iac)
-
-## Format strings
-# set the natural gas and demand to 2 digits accuracy
-iac = dollar(['NGC','NRR'],iac,2)
-# set the rest to integer
-varList = ['ACS', 'IC', 'PARTS', 'LABOR', 'RB', 'MRB', 'MIC']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
-
-# Import docx template
-doc = Document('template.docx')
-
-# Rebate Section
-docx_blocks(doc, REBATE = iac.REB)
-
-# Replacing keys
-docx_replace(doc, **iac)
-
-savefile(doc, iac.REC)
-
-# Caveats
-caveat("Please modify highlighted region if necessary.")
\ No newline at end of file
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    iac = deepcopy(inputs)
+    # Calculations
+    iac.OH = int(iac.HR * iac.DY * iac.WK)
+    iac.CAH = round(AFR.AFR(iac.CAT, iac.FGT, iac.O2),2)
+    # Proposed condition is 2% O2
+    iac.PAH = round(AFR.AFR(iac.CAT, iac.FGT, 2),2)
+    iac.SAV = round((iac.PAH - iac.CAH)/iac.PAH * 100, 2)
+    iac.IC = round(iac.LABOR + iac.PARTS)
+    iac.NGS = round(iac.SIZE * iac.OH * (iac.LF/100) * (iac.SAV/100))
+    iac.ACS = round(iac.NGS * iac.NGC)
+
+    # Rebate
+    iac = rebate(iac)
+    return iac
+
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    from docx import Document
+    from python_docx_replace import docx_blocks
+    iac = deepcopy(results)
+    ## Format strings
+    # set the natural gas and demand to 2 digits accuracy
+    iac = dollar(['NGC','NRR'],iac,2)
+    # set the rest to integer
+    varList = ['ACS', 'IC', 'PARTS', 'LABOR', 'RB', 'MRB', 'MIC']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
+
+    # Import docx template
+    doc = Document(os.path.join(FOLDER, 'template.docx'))
+
+    # Rebate Section
+    docx_blocks(doc, REBATE = iac.REB)
+
+    # Replacing keys
+    replace_tags(doc, iac)
+    return doc
+
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC))
+
+    # Caveats
+    caveat("Please modify highlighted region if necessary.")
\ No newline at end of file
@@ -2,233 +2,40 @@
 Fully-automated IAC report compiler
 Usage: Copy all recommendations into the Recommendations folder, Update info in Compiler.json5 and Utility.json5,
 then run this script.
+Use --jobs N to extract information from new recommendations in N worker processes, while the documents
+are parsed for combining in this process. Only worth it for many new recommendations on a multi-core machine.
+Intermediate documents are kept in .cache/build/, only the sections whose inputs changed are rebuilt.
 """
 
 
-import json5, os, locale, datetime, math, platform, re
-import pandas as pd
+import json5, os, datetime, math, platform, re, argparse, concurrent.futures
 from easydict import EasyDict
 from docx import Document, shared
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_ORIENT
 from docx.enum.style import WD_STYLE_TYPE
-from docxcompose.composer import Composer
-from python_docx_replace import docx_replace, docx_blocks
+from python_docx_replace import docx_blocks
 from Shared.IAC import *
-
-# Check if Description.docx has been changed
-docTest = Document(os.path.join('Report', 'Description.docx'))
-answer = ""
-# If finds "#Insert plant layout picture here and delete this line", the file has not been changed yet
-for p in docTest.paragraphs:
-    if "#Insert plant layout picture here and delete this line" in p.text:
-        caveat("Looks like Report/Description.docx has not been changed yet.")
-        print("You may edit the document and run the script again,")
-        print("or ignore this message and edit the final report.")
-        while True:
-            answer = input("Do you wish to continue? (y/n): ")
-            if answer.lower() == 'y':
-                break
-            elif answer.lower() == 'n':
-                exit()
-            else:
-                pass
-
-# If Recommendations/Sorted/ folder doesn't exist, create one
-os.makedirs(os.path.join('Recommendations', 'Sorted'), exist_ok=True)
-
-# If on macOS
-if os.path.exists(os.path.join('Energy Charts', 'Energy Charts.fld')):
-    chartPath = os.path.join('Energy Charts', 'Energy Charts.fld')
-# If on Windows
-elif os.path.exists(os.path.join('Energy Charts', 'Energy Charts_files')):
-    chartPath = os.path.join('Energy Charts', 'Energy Charts_files')
-else:
-    # If chart html folder doesn't exist, exit
-    raise Exception("Chart images not found. Please save the energy chart as web page (.htm).")
-
-# Load config file and convert everything to local variables
-print("Reading json5 database...", end ="")
-jsonDict = json5.load(open('Compiler.json5'))
-jsonDict.update(json5.load(open('Utility.json5')))
-iac = EasyDict(jsonDict)
-print("done")
-
-# Initialize dataframe
-columns = ["isAdditional", "File Name", "ARC No.", "Description", "Electricity (kWh)", "Electricity (MMBtu)", "Demand (kW)"
-           , "Natural Gas (MMBtu)", "Other Energy Type", "Other Energy Amount", "Other Resource Type", "Other Resource Amount"
-           , "Savings Type", "Savings Value", "Annual Cost Savings", "Implementation Cost", "Payback Period"]
-df = pd.DataFrame(columns=columns)
-
-# Set locale to en_US
-try:
-    locale.setlocale(locale.LC_ALL, "en_US")
-except: # Linux?
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
-
-print("Reading recommendations...")
-# Get all .docx files in Recommendations/ directory and extract information
-recList = [f for f in os.listdir('Recommendations') if f.endswith('.docx')]
-recID = 0
-for recDoc in recList:
-    print(recDoc)
-    doc = Document(os.path.join('Recommendations', recDoc))
-    recInfo = {}
-    # Record file name
-    recInfo['File Name'] = recDoc
-
-    # Parse document title
-    fullTitle = doc.paragraphs[0].text
-    separatorFlag = False
-    # list of possible separators
-    separatorList = [":", "-", "–"]
-    for separator in separatorList:
-        if separator in fullTitle:
-            separatorFlag = True
-            # check if the document is an additional recommendation by title
-            # Keep "AAR" for outdated documents
-            recInfo['isAdditional'] = ("Additional" in fullTitle.split(separator)[0]) or ("AAR" in fullTitle.split(separator)[0])
-            # Parse the title of the .docx file
-            recInfo['Description'] = title_case(fullTitle.split(separator)[1].strip())
-            break
-    if separatorFlag == False:
-        raise Exception("Can't parse document title:\n" + fullTitle)
-    
-    # Read the 1st table in .docx files
-    try:
-        table = doc.tables[0]
-    except:
-        raise Exception("Error: " + recDoc + " is not a valid recommendation. Please check if the summary table is present.")
-
-    for row in table.rows:
-        key = row.cells[0].text
-        value = row.cells[1].text
-        # Parse ARC Number
-        if "arc" in key.lower() and "number" in key.lower():
-            validate_arc(value)
-            recInfo['ARC No.'] = value
-        # Parse Annual Cost Savings
-        elif "annual" in key.lower() and "cost" in key.lower():
-            # convert currency to interger
-            recInfo['Annual Cost Savings'] = locale.atoi(value.strip("$"))
-        # Parse Implementation Cost
-        elif "implementation" in key.lower():
-            # convert currency to interger
-            recInfo['Implementation Cost'] = locale.atoi(value.strip("$"))
-        # If Payback Period skip (Doesn't matter, will calculate later)
-        elif "payback" in key.lower():
-            continue
-        # Parse Electricity
-        elif "electricity" in key.lower():
-            recInfo['Electricity (kWh)'] = locale.atoi(value.split(' ')[0])
-        # Parse Demand
-        elif "demand" in key.lower():
-            recInfo['Demand (kW)'] = locale.atoi(value.split(' ')[0])
-        # Parse Natural Gas
-        elif "natural" in key.lower():
-            recInfo['Natural Gas (MMBtu)'] = locale.atoi(value.split(' ')[0])
-        # Parse undefined type
-        else:
-            # If the value contains mmbtu, parse it as other energy
-            if "mmbtu" in value.lower():
-                # Remove "annual" (usually the first word)
-                if "annual" in key.lower():
-                    key = key.split(' ', 1)[1]
-                # Remove "savings" (usually the last word)
-                if "saving" in key.lower():
-                    key = key.rsplit(' ', 1)[0]
-                recInfo['Other Energy Type'] = title_case(key)
-                # Parse number
-                recInfo['Other Energy Amount'] = locale.atoi(value.split(' ')[0])
-            # If not, parse it as other resource
-            else:
-                # Remove "annual" (usually the first word)
-                if "annual" in key.lower():
-                    key = key.split(' ', 1)[1]
-                # Remove "savings" (usually the last word)
-                if "saving" in key.lower():
-                    key = key.rsplit(' ', 1)[0]
-                recInfo['Other Resource Type'] = title_case(key)
-                # Keep the whole string
-                recInfo['Other Resource Amount'] = value   
-    # Add dictionary to dataframe
-    for key in recInfo:
-        df.loc[recID, key] = recInfo[key]
-    recID += 1
-print("done")
-
-print("Analyzing recommendations...", end ="")
-## Calculate on columns
-# Calculate payback period
-df['Payback Period'] = df['Implementation Cost'] / df['Annual Cost Savings']
-# Convert electricity to MMBtu
-df['Electricity (MMBtu)'] = df['Electricity (kWh)']* 0.003413/0.33
-# Sort df by payback period
-df = df.sort_values(by=['Payback Period'])
-
-## Format energy savings strings
-for index, row in df.iterrows():
-    ST = ""
-    SV = ""
-    if pd.notna(row['Electricity (kWh)']):
-        ST = ST + "Electricity" + '\n\n'
-        SV = SV + locale.format_string('%d',row['Electricity (kWh)'], grouping=True) + ' kWh' + '\n'
-        SV = SV + '(' + locale.format_string('%d',row['Electricity (MMBtu)'], grouping=True) + ' MMBtu)' + '\n'
-    if pd.notna(row['Demand (kW)']):
-        ST = ST + "Demand" + '\n'
-        SV = SV + locale.format_string('%d',row['Demand (kW)'], grouping=True) + ' kW' + '\n'
-    if pd.notna(row['Natural Gas (MMBtu)']):
-        ST = ST + "Natural Gas" + '\n'
-        SV = SV + locale.format_string('%d',row['Natural Gas (MMBtu)'], grouping=True)  + ' MMBtu' + '\n'
-    if pd.notna(row['Other Energy Type']):
-        ST = ST + row['Other Energy Type'] + '\n'
-        SV = SV + locale.format_string('%d',row['Other Energy Amount'], grouping=True)  + ' MMBtu' '\n'
-    if pd.notna(row['Other Resource Type']):
-        ST = ST + row['Other Resource Type'] + '\n'
-        SV = SV + row['Other Resource Amount'] + '\n'
-    ST = ST.rstrip('\n')
-    SV = SV.rstrip('\n')
-    df.at[index, 'Savings Type'] = ST
-    df.at[index, 'Savings Value'] = SV
-
-## Summation statistics
-# Filter Recommendationss
-recData = df[df['isAdditional'] == False]
-# Reorder index
-recData = recData.reset_index(drop=True)
-# Recommendations statistics
-EkWh = recData['Electricity (kWh)'].sum(axis=0, skipna=True)
-EMMBtu = recData['Electricity (MMBtu)'].sum(axis=0, skipna=True)
-NMMBtu = recData['Natural Gas (MMBtu)'].sum(axis=0, skipna=True)
-OMMBtu = recData['Other Energy Amount'].sum(axis=0, skipna=True)
-# Add up all energy in MMBtu
-iac.MMBtu = round(EMMBtu + NMMBtu + OMMBtu)
-# Calculate CO2
-if iac.FuelType == "Natural Gas":
-    iac.FuelCO2 = 53
-    iac.CO2 = round((iac.FuelCO2 * NMMBtu + 0.315 * EkWh)/1000)
-elif iac.FuelType == "Propane":
-    iac.FuelCO2 = 61.7
-    iac.CO2 = round((iac.FuelCO2 * OMMBtu + 0.315 * EkWh)/1000)
-elif iac.FuelType == "Fuel Oil #2":
-    iac.FuelCO2 = 73.51
-    iac.CO2 = round((iac.FuelCO2 * OMMBtu + 0.315 * EkWh)/1000)
-# Add up all cost
-iac.ACS = recData['Annual Cost Savings'].sum(axis=0, skipna=True)
-iac.IC = recData['Implementation Cost'].sum(axis=0, skipna=True)
-# Payback period in number
-iac.PB = math.ceil(iac.IC / iac.ACS * 10) / 10
-# Payback period in formatted string
-iac.PBstr = payback(iac.ACS, iac.IC)
-print("done")
-
-print("Reformatting recommendations...", end ="")
-subtitleList = ["Recommended Actions","Summary of Estimated Savings and Implementation Costs","Current Practice and Observations","Anticipated Savings","Implementation Costs","Implementation Cost References"]
-## Reformatting Recommendations
-for index, row in recData.iterrows():
-    doc = Document(os.path.join('Recommendations', row['File Name']))
-    # Change title and make it upper case
-    doc.paragraphs[0].text = "Recommendation "+ str(index+1) + ': ' + title_case(row['Description'])
+from Shared.Charts import VERSION as CHART_VERSION
+
+# Bump when the information extracted from recommendations changes
+REC_CACHE_VERSION = 1
+# Code generating the sections, a change rebuilds them
+CODE = ['Compiler.py', os.path.join('Shared', 'IAC.py')]
+# Code computing the energy bill analysis from the workbook
+UTILITY_CODE = [os.path.join('Shared', 'UtilityData.py'), os.path.join('Shared', 'Bills.py')]
+
+# Subtitles to be restyled in recommendations, single or plural
+SUBTITLES = ["Recommended Actions","Summary of Estimated Savings and Implementation Costs","Current Practice and Observations","Anticipated Savings","Implementation Costs","Implementation Cost References"]
+
+def reformat_rec(doc, title: str):
+    """
+    Set the numbered title of a recommendation and enforce title, subtitle and caption styles
+    :param doc: Document
+    :param title: Title of the recommendation as string
+    """
+    # Change title
+    doc.paragraphs[0].text = title
     # Enforce Heading 1 style
     try:
         doc.paragraphs[0].style = doc.styles['Heading 1']
@@ -239,7 +46,7 @@ for index, row in recData.iterrows():
     # This style is already defined in Introduction.docx
     for paragraph in doc.paragraphs:
         txt = paragraph.text
-        for subtitle in subtitleList:
+        for subtitle in SUBTITLES:
             # single or plural
             if txt == subtitle or txt == subtitle[:-1]:
                 try:
@@ -255,343 +62,543 @@ for index, row in recData.iterrows():
                 doc.styles.add_style('Caption', WD_STYLE_TYPE.PARAGRAPH)
                 paragraph.style = doc.styles['Caption']
 
-    # Save file with sorted filename
-    doc.save(os.path.join('Recommendations', 'Sorted', 'Rec'+ str(index+1) + '.docx'))
-print("done")
+def write_intro(iac: dict, recData, addData, hasAdditional: bool, filename: str):
+    """
+    Fill the introduction template with plant information and recommendation tables
+    :param iac: EasyDict with formatted strings
+    :param recData: Dataframe of recommendations sorted by payback period
+    :param addData: Dataframe of additional recommendations sorted by payback period
+    :param hasAdditional: If there's at least 1 additional recommendation
+    :param filename: Output path as string
+    """
+    ## Load introduction template
+    docIntro = Document(os.path.join('Report', 'Introduction.docx'))
+
+    # Add rows to Recommendation table (Should be the 3rd table)
+    print("Writing recommendation table...", end ="")
+    recTable = docIntro.tables[2]
+    for index, row in recData.iterrows():
+        recRow = recTable.rows[index+1].cells
+        # Add ARC No.
+        recRow[0].text = 'Rec. ' + str(index+1) + '\n' + row['ARC No.']
+        recRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Add description
+        recRow[1].text = row['Description']
+        recRow[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+        # Add savings type
+        recRow[2].text = row['Savings Type']
+        recRow[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Add savings value
+        recRow[3].text = row['Savings Value']
+        recRow[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        # Add annual cost savings
+        recRow[4].text = format_currency(row['Annual Cost Savings'])
+        recRow[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Add implementation cost
+        recRow[5].text = format_currency(row['Implementation Cost'])
+        recRow[5].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Add payback period
+        pb = row['Payback Period']
+        if pb == 0:
+            recRow[6].text = "Immediate"
+        else:
+            recRow[6].text = str(math.ceil(pb * 10) / 10)
+        recRow[6].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Set 3pt before and after paragraph
+        for col in range(0,7):
+            recRow[col].paragraphs[0].paragraph_format.space_before = shared.Pt(3)
+            recRow[col].paragraphs[0].paragraph_format.space_after = shared.Pt(3)
+    # Delete unused rows (Currectly row 1-15 are empty)
+    for index in reversed(range(len(recData), 15)):
+        recTable._tbl.remove(recTable.rows[index+1]._tr)
+    print("done")
+
+    if hasAdditional:
+        # Add rows to additional recommendation table (Should be the 4th table)
+        print("Writing Additional Recommendation table...", end ="")
+        addTable = docIntro.tables[3]
+        for index, row in addData.iterrows():
+            addRow = addTable.rows[index+1].cells
+            # Add ARC No.
+            addRow[0].text = 'Add. Rec. ' + str(index+1) + '\n' + row['ARC No.']
+            addRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Add description
+            addRow[1].text = row['Description']
+            addRow[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+            # Add savings type
+            addRow[2].text = row['Savings Type']
+            addRow[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Add savings value
+            addRow[3].text = row['Savings Value']
+            addRow[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Add annual cost savings
+            addRow[4].text = format_currency(row['Annual Cost Savings'])
+            addRow[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            # Add implementation cost
+            addRow[5].text = format_currency(row['Implementation Cost'])
+            addRow[5].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+            # Add payback period
+            pb = row['Payback Period']
+            addRow[6].text = str(math.ceil(pb * 10) / 10)
+            addRow[6].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Set 3pt before and after paragraph
+        for col in range(0,7):
+            addRow[col].paragraphs[0].paragraph_format.space_before = shared.Pt(3)
+            addRow[col].paragraphs[0].paragraph_format.space_after = shared.Pt(3)
+        # Delete unused rows (Currectly row 1-5 are empty)
+        for index in reversed(range(len(addData), 5)):
+            addTable._tbl.remove(addTable.rows[index+1]._tr)
+        print("done")
+    else:
+        # delete this table
+        docIntro._body._body.remove(docIntro.tables[3]._tbl)
+
+    # Remove Add blocks if no Additional
+    docx_blocks(docIntro, ADD = hasAdditional)
+
+    # Replacing keys
+    print("Replacing keys in introduction...", end ="")
+    replace_tags(docIntro, iac)
+    print("done")
+
+    docIntro.save(filename)
+
+def write_background(iac: dict, filename: str):
+    """
+    Fill the background template with plant information
+    :param iac: EasyDict with formatted strings
+    :param filename: Output path as string
+    """
+    ## Load backgroud template
+    docBackground = Document(os.path.join('Report', 'Background.docx'))
+
+    # Replacing keys
+    print("Replacing keys in background...", end ="")
+    replace_tags(docBackground, iac)
+    print("done")
+
+    docBackground.save(filename)
+
+def fit_rows(table, count: int, header: int=3):
+    """
+    Copy month rows before the total row until a table has enough rows for more than 12 months
+    :param table: python-docx table with header rows, month rows and the total row
+    :param count: Number of rows after the header, including the total row
+    :param header(optional): Number of header rows
+    """
+    from copy import deepcopy
+    while len(table.rows) - header < count:
+        table.rows[-2]._tr.addnext(deepcopy(table.rows[-2]._tr))
+
+def write_energy(iac: dict, filename: str):
+    """
+    Fill the energy bill analysis template with chart images and monthly tables
+    :param iac: EasyDict with formatted strings
+    :param filename: Output path as string
+    """
+    from Shared.UtilityData import load_utility
+    from Shared.Charts import render_charts
+    ## Load energy bill analysis template
+    docEnergy = Document(os.path.join('Report', 'Energy.docx'))
+    # Monthly tables from the utility model, shared with Utility.py
+    utility = load_utility()
+
+    # Add energy chart images
+    print("Adding energy chart images...", end ="")
+    # Charts are rendered from the monthly tables
+    add_images(docEnergy, render_charts(utility))
+    print("done")
+
+    # Fill in energy chart tables from Energy Charts.xlsx
+    print("Adding energy chart tables...", end ="")
+
+    # Add rows to electricity table (Should be the 1st table)
+    eTable = docEnergy.tables[0]
+    fit_rows(eTable, len(utility.Electricity))
+    for index, row in enumerate(utility.Electricity):
+        eRow = eTable.rows[index+3].cells
+        # Add Month
+        eRow[0].text = row[0]
+        eRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for col in range(1,8):
+            # Add interger with thousand separator
+            eRow[col].text = format_int(round(row[col]))
+            eRow[col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Bold the last row
+        if index == len(utility.Electricity) - 1:
+            for col in range(0,8):
+                eRow[col].paragraphs[0].runs[0].bold = True
+
+    # Add rows to fuel table (Should be the 2nd table)
+    fTable = docEnergy.tables[1]
+    fit_rows(fTable, len(utility.Fuel))
+    for index, row in enumerate(utility.Fuel):
+        fRow = fTable.rows[index+3].cells
+        # Add Month
+        fRow[0].text = row[0]
+        fRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for col in range(1,4):
+            # Add interger with thousand separator
+            fRow[col].text = format_int(round(row[col]))
+            fRow[col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        # Bold the last row
+        if index == len(utility.Fuel) - 1:
+            for col in range(0,4):
+                fRow[col].paragraphs[0].runs[0].bold = True
+    print("done")
+    # Replacing keys
+    print("Replacing keys in energy charts...", end ="")
+    replace_tags(docEnergy, iac)
+    print("done")
+    docEnergy.save(filename)
+
+def is_stale(manifest: dict, name: str, key: str, output: str) -> bool:
+    """
+    Check if a build output needs to be regenerated
+    :param manifest: Dictionary of build step names and the input keys of their last build
+    :param name: Build step name as string
+    :param key: Key of the current inputs, see build_key()
+    :param output: Path of the build output
+    :return: True if the inputs changed or the output is missing
+    """
+    return manifest.get(name) != key or not os.path.isfile(output)
+
+def final_caveats(answer: str):
+    """
+    Remind the manual steps left in the final report, whether it was rebuilt or not
+    :param answer: "y" if Report/Description.docx has not been changed yet
+    """
+    caveat("Please select all (Ctrl+A) then refresh TWICE (F9) ToC, list of tables/figures.")
+
+    if answer.lower() == 'y':
+        caveat("Please manually add Process Description, Major Equipment, Current Best Practices, and plant layout image.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fully-automated IAC report compiler")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="number of worker processes for extracting information from recommendations")
+    args = parser.parse_args()
+
+    # Check if Description.docx has been changed
+    docTest = Document(os.path.join('Report', 'Description.docx'))
+    answer = ""
+    # If finds "#Insert plant layout picture here and delete this line", the file has not been changed yet
+    for p in docTest.paragraphs:
+        if "#Insert plant layout picture here and delete this line" in p.text:
+            caveat("Looks like Report/Description.docx has not been changed yet.")
+            print("You may edit the document and run the script again,")
+            print("or ignore this message and edit the final report.")
+            while True:
+                answer = input("Do you wish to continue? (y/n): ")
+                if answer.lower() == 'y':
+                    break
+                elif answer.lower() == 'n':
+                    exit()
+                else:
+                    pass
+
+    # Load config file and convert everything to local variables
+    print("Reading json5 database...", end ="")
+    jsonDict = json5.load(open('Compiler.json5'))
+    jsonDict.update(json5.load(open('Utility.json5')))
+    iac = EasyDict(jsonDict)
+    print("done")
+
+    # Dataframe columns
+    columns = ["isAdditional", "File Name", "ARC No.", "Description", "Electricity (kWh)", "Electricity (MMBtu)", "Demand (kW)"
+               , "Natural Gas (MMBtu)", "Other Energy Type", "Other Energy Amount", "Other Resource Type", "Other Resource Amount"
+               , "Savings Type", "Savings Value", "Annual Cost Savings", "Implementation Cost", "Payback Period"]
+    numColumns = ["Electricity (kWh)", "Electricity (MMBtu)", "Demand (kW)", "Natural Gas (MMBtu)", "Other Energy Amount"
+                  , "Annual Cost Savings", "Implementation Cost", "Payback Period"]
+
+    # pandas is slow to import, wait until the inputs are checked
+    import pandas as pd
+    print("Reading recommendations...")
+    # Get all .docx files in Recommendations/ directory, sorted to make the order reproducible
+    recList = sorted([f for f in os.listdir('Recommendations') if f.endswith('.docx')])
+    # Information of unchanged recommendations is cached by file content
+    recCache = load_cache('recommendations')
+    if recCache.get('version') != REC_CACHE_VERSION:
+        recCache = {'version': REC_CACHE_VERSION, 'records': {}}
+    recHash = {recDoc: file_hash(os.path.join('Recommendations', recDoc)) for recDoc in recList}
+    newList = [recDoc for recDoc in recList if recHash[recDoc] not in recCache['records']]
+    # Parsed documents are kept in memory and reused for reformatting and combining
+    recDocs = {}
+    if args.jobs > 1 and len(newList) > 1:
+        # Workers only extract information, documents can't be sent back between processes.
+        # Meanwhile the main process parses the same documents once for reformatting and combining
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            newInfo = executor.map(read_rec, [os.path.join('Recommendations', recDoc) for recDoc in newList])
+            for recDoc in newList:
+                recDocs[recDoc] = Document(os.path.join('Recommendations', recDoc))
+            newInfoList = list(newInfo)
+    else:
+        newInfoList = []
+        for recDoc in newList:
+            recDocs[recDoc] = Document(os.path.join('Recommendations', recDoc))
+            newInfoList.append(parse_rec(recDocs[recDoc], recDoc))
+    for recDoc, recInfo in zip(newList, newInfoList):
+        recCache['records'][recHash[recDoc]] = recInfo
+    # Merge information in file name order
+    records = []
+    for recDoc in recList:
+        # Same content may be saved under a different file name
+        records.append(dict(recCache['records'][recHash[recDoc]], **{'File Name': recDoc}))
+    # Validate all ARC numbers in one call and report every failure together
+    arcRecords = [recInfo for recInfo in records if 'ARC No.' in recInfo]
+    arcResults = validate_arcs([recInfo['ARC No.'] for recInfo in arcRecords])
+    arcResults = dict(zip([recInfo['File Name'] for recInfo in arcRecords], arcResults))
+    arcErrors = []
+    for recDoc in recList:
+        print(recDoc + (" (cached)" if recDoc not in newList else ""))
+        result = arcResults.get(recDoc)
+        if result is None:
+            continue
+        if result['error'] is None:
+            print_arc(result)
+        else:
+            arcErrors.append(recDoc + ": " + str(result['ARC']) + " - " + result['error'])
+    if arcErrors:
+        raise Exception("Invalid ARC numbers:\n" + "\n".join(arcErrors))
+    # Build dataframe in one shot, missing values are NaN
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df = df.astype({column: 'float64' for column in numColumns})
+    df = df.astype({column: object for column in columns if column not in numColumns})
+    df = df.astype({'isAdditional': bool})
+    print("done")
 
-# Check if there's at least 1 additional recommendation
-hasAdditional = df['isAdditional'].any()
-if hasAdditional:
-    print("Analyzing additional recommendations...", end ="")
+    print("Analyzing recommendations...", end ="")
+    ## Calculate on columns
+    # Calculate payback period
+    df['Payback Period'] = df['Implementation Cost'] / df['Annual Cost Savings']
+    # Convert electricity to MMBtu
+    df['Electricity (MMBtu)'] = df['Electricity (kWh)']* 0.003413/0.33
+    # Sort df by payback period
+    df = df.sort_values(by=['Payback Period'], kind='stable')
+
+    ## Format energy savings strings, cached recommendations are already formatted
+    rows = df[df['Savings Type'].isna()]
+    def grouped(column):
+        # Truncate to integer with thousand separator, missing values stay NaN
+        return rows[column].map(lambda x: f'{int(x):,}', na_action='ignore').astype(object)
+    def named(column, name):
+        # Savings type name where the column has a value
+        return pd.Series(name, index=rows.index, dtype=object).where(rows[column].notna())
+    # Savings type and value strings of each kind, NaN if not saved by the recommendation
+    savings = [(named('Electricity (kWh)', 'Electricity\n'), grouped('Electricity (kWh)') + ' kWh\n(' + grouped('Electricity (MMBtu)') + ' MMBtu)'),
+               (named('Demand (kW)', 'Demand'), grouped('Demand (kW)') + ' kW'),
+               (named('Natural Gas (MMBtu)', 'Natural Gas'), grouped('Natural Gas (MMBtu)') + ' MMBtu'),
+               (rows['Other Energy Type'], grouped('Other Energy Amount') + ' MMBtu'),
+               (rows['Other Resource Type'], rows['Other Resource Amount'])]
+    ST = pd.Series('', index=rows.index, dtype=object)
+    SV = pd.Series('', index=rows.index, dtype=object)
+    for savingsType, savingsValue in savings:
+        ST = ST + (savingsType + '\n').fillna('')
+        SV = SV + (savingsValue + '\n').fillna('')
+    df.loc[rows.index, 'Savings Type'] = ST.str.rstrip('\n')
+    df.loc[rows.index, 'Savings Value'] = SV.str.rstrip('\n')
+    for fileName, savingsType, savingsValue in zip(rows['File Name'], df.loc[rows.index, 'Savings Type'], df.loc[rows.index, 'Savings Value']):
+        recCache['records'][recHash[fileName]].update({'Savings Type': savingsType, 'Savings Value': savingsValue})
+    # Only keep the recommendations that are still present
+    recCache['records'] = {recHash[recDoc]: recCache['records'][recHash[recDoc]] for recDoc in recList}
+    save_cache('recommendations', recCache)
+
+    ## Summation statistics
+    # Filter Recommendationss
+    recData = df[df['isAdditional'] == False]
+    # Reorder index
+    recData = recData.reset_index(drop=True)
+    # Recommendations statistics
+    EkWh = recData['Electricity (kWh)'].sum(axis=0, skipna=True)
+    EMMBtu = recData['Electricity (MMBtu)'].sum(axis=0, skipna=True)
+    NMMBtu = recData['Natural Gas (MMBtu)'].sum(axis=0, skipna=True)
+    OMMBtu = recData['Other Energy Amount'].sum(axis=0, skipna=True)
+    # Add up all energy in MMBtu
+    iac.MMBtu = round(EMMBtu + NMMBtu + OMMBtu)
+    # Calculate CO2
+    if iac.FuelType == "Natural Gas":
+        iac.FuelCO2 = 53
+        iac.CO2 = round((iac.FuelCO2 * NMMBtu + 0.315 * EkWh)/1000)
+    elif iac.FuelType == "Propane":
+        iac.FuelCO2 = 61.7
+        iac.CO2 = round((iac.FuelCO2 * OMMBtu + 0.315 * EkWh)/1000)
+    elif iac.FuelType == "Fuel Oil #2":
+        iac.FuelCO2 = 73.51
+        iac.CO2 = round((iac.FuelCO2 * OMMBtu + 0.315 * EkWh)/1000)
+    # Add up all cost
+    iac.ACS = recData['Annual Cost Savings'].sum(axis=0, skipna=True)
+    iac.IC = recData['Implementation Cost'].sum(axis=0, skipna=True)
+    # Payback period in number
+    iac.PB = math.ceil(iac.IC / iac.ACS * 10) / 10
+    # Payback period in formatted string
+    iac.PBstr = payback(iac.ACS, iac.IC)
+    print("done")
+
+    # Check if there's at least 1 additional recommendation
+    hasAdditional = df['isAdditional'].any()
     # Filter additional
     addData = df[df['isAdditional'] == True]
     # Reorder index
     addData = addData.reset_index(drop=True)
-    # Additional statistics
-    EMMBtu = addData['Electricity (MMBtu)'].sum(axis=0, skipna=True)
-    NMMBtu = addData['Natural Gas (MMBtu)'].sum(axis=0, skipna=True)
-    OMMBtu = addData['Other Energy Amount'].sum(axis=0, skipna=True)
-    # Add up all energy
-    iac.AddMMBtu = round(EMMBtu + NMMBtu + OMMBtu)
-    # Add up all cost
-    iac.AddACS = addData['Annual Cost Savings'].sum(axis=0, skipna=True)
-    iac.AddIC = addData['Implementation Cost'].sum(axis=0, skipna=True)
-    # Payback period in number
-    iac.AddPB = round(iac.AddIC / iac.AddACS, 1)
+    if hasAdditional:
+        print("Analyzing additional recommendations...", end ="")
+        # Additional statistics
+        EMMBtu = addData['Electricity (MMBtu)'].sum(axis=0, skipna=True)
+        NMMBtu = addData['Natural Gas (MMBtu)'].sum(axis=0, skipna=True)
+        OMMBtu = addData['Other Energy Amount'].sum(axis=0, skipna=True)
+        # Add up all energy
+        iac.AddMMBtu = round(EMMBtu + NMMBtu + OMMBtu)
+        # Add up all cost
+        iac.AddACS = addData['Annual Cost Savings'].sum(axis=0, skipna=True)
+        iac.AddIC = addData['Implementation Cost'].sum(axis=0, skipna=True)
+        # Payback period in number
+        iac.AddPB = round(iac.AddIC / iac.AddACS, 1)
+        print("done")
+
+    print("Parsing plant information...", end ="")
+
+    ## Compiler.json5 Calculations
+    # Report date = today or 60 days after assessment, which ever is earlier
+    VD = datetime.datetime.strptime(iac.VDATE, '%B %d, %Y')
+    RDATE = min(datetime.datetime.today(), VD + datetime.timedelta(days=60))
+    if platform.system() == 'Windows':
+        iac.RDATE = datetime.datetime.strftime(RDATE, '%B %#d, %Y')
+    else: # macOS or Linux
+        iac.RDATE = datetime.datetime.strftime(RDATE, '%B %-d, %Y')
+
+    # Sort participant and contributor name list
+    iac.PARTlist.sort(key=lambda x: x.rsplit(' ', 1)[1])
+    PART=""
+    for name in iac.PARTlist:
+        PART  = PART + name + '\n'
+    iac.PART = PART.rstrip('\n')
+    iac.pop('PARTlist')
+
+    iac.CONTlist.sort(key=lambda x: x.rsplit(' ', 1)[1])
+    CONT=""
+    for name in iac.CONTlist:
+        CONT  = CONT + name + '\n'
+    iac.CONT = CONT.rstrip('\n')
+    iac.pop('CONTlist')
     print("done")
 
-    print("Reformatting additional recommendations...", end ="")
-    # Modify the title of the additional recommendation docx
+    # products in different cases
+    iac.PRODTitle = iac.PROD.title()
+    iac.PRODlower = iac.PROD.lower()
+
+    ## Format strings
+    # set electricity cost to 3 digits accuracy
+    iac = dollar(['EC'],iac,3)
+    # set the natural gas and demand to 2 digits accuracy
+    iac = dollar(['DC', 'FC'],iac,2)
+    # set the rest to integer
+    varList = ['ACS', 'IC', 'TotalECost', 'TotalFCost', 'TotalCost']
+    if hasAdditional:
+        varList.extend(['AddACS', 'AddIC'])
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
+
+    ## Incremental build, intermediate documents are kept in .cache/build/
+    buildPath = cache_path('build')
+    os.makedirs(buildPath, exist_ok=True)
+    manifest = load_cache('build')
+    # Recommendation tables only depend on the dataframe
+    tableColumns = ['File Name', 'ARC No.', 'Description', 'Savings Type', 'Savings Value', 'Annual Cost Savings', 'Implementation Cost', 'Payback Period']
+    tables = {'rec': recData[tableColumns].to_dict('records'), 'add': addData[tableColumns].to_dict('records')}
+
+    filenameIntro = os.path.join(buildPath, iac.LE + '-intro.docx')
+    introKey = build_key([iac, tables], CODE + [os.path.join('Report', 'Introduction.docx')])
+    if is_stale(manifest, 'intro', introKey, filenameIntro):
+        write_intro(iac, recData, addData, hasAdditional, filenameIntro)
+        manifest['intro'] = introKey
+        save_cache('build', manifest)
+    else:
+        print("Introduction is up to date.")
+
+    filenameBackground = os.path.join(buildPath, iac.LE + '-back.docx')
+    backKey = build_key(iac, CODE + [os.path.join('Report', 'Background.docx')])
+    if is_stale(manifest, 'background', backKey, filenameBackground):
+        write_background(iac, filenameBackground)
+        manifest['background'] = backKey
+        save_cache('build', manifest)
+    else:
+        print("Background is up to date.")
+
+    filenameEnergy = os.path.join(buildPath, iac.LE + '-energy.docx')
+    # Charts are rendered from the workbook
+    energyKey = build_key([iac, CHART_VERSION], CODE + UTILITY_CODE + [os.path.join('Report', 'Energy.docx'),
+                                                       os.path.join('Energy Charts', 'Energy Charts.xlsx')])
+    if is_stale(manifest, 'energy', energyKey, filenameEnergy):
+        write_energy(iac, filenameEnergy)
+        manifest['energy'] = energyKey
+        save_cache('build', manifest)
+    else:
+        print("Energy charts are up to date.")
+
+    # The final report depends on all sections and the recommendations in order
+    filename = iac.LE +'.docx'
+    reportFiles = [os.path.join('Report', f) for f in ['ToC.docx', 'Add.docx', 'Description.docx', 'BestPractice.docx']]
+    reportKey = build_key([introKey, backKey, energyKey, [[f, recHash[f]] for f in recData['File Name']],
+                           [[f, recHash[f]] for f in addData['File Name']]], reportFiles)
+    if not is_stale(manifest, 'report', reportKey, filename):
+        print(filename + " is up to date.")
+        final_caveats(answer)
+        return
+
+    # Load documents that were not parsed in this run
+    for recDoc in recList:
+        if recDoc not in recDocs:
+            recDocs[recDoc] = Document(os.path.join('Recommendations', recDoc))
+
+    print("Reformatting recommendations...", end ="")
+    for index, row in recData.iterrows():
+        reformat_rec(recDocs[row['File Name']], "Recommendation "+ str(index+1) + ': ' + title_case(row['Description']))
     for index, row in addData.iterrows():
-        doc = Document(os.path.join('Recommendations', row['File Name']))
-        # Change title and make it upper case
-        doc.paragraphs[0].text = "Additional Recommendation "+ str(index+1) + ': ' + title_case(row['Description'])
-        # Enforce Heading 1 style
-        try:
-            doc.paragraphs[0].style = doc.styles['Heading 1']
-        except:
-            doc.styles.add_style('Heading 1', WD_STYLE_TYPE.PARAGRAPH)
-            doc.paragraphs[0].style = doc.styles['Heading 1']
-        # Enforce Subtitle style
-        # This style is already defined in Introduction.docx
-        for paragraph in doc.paragraphs:
-            txt = paragraph.text
-            for subtitle in subtitleList:
-                # single or plural
-                if txt == subtitle or txt == subtitle[:-1]:
-                    try:
-                        paragraph.style = doc.styles['Subtitle']
-                    except:
-                        doc.styles.add_style('Subtitle', WD_STYLE_TYPE.PARAGRAPH)
-                        paragraph.style = doc.styles['Subtitle']
-            # Fix table/figure captions
-            if re.search('^\s?Table\s\d{1,2}:', txt) != None or re.search('^\s?Figure\s\d{1,2}:', txt) != None:
-                try:
-                    paragraph.style = doc.styles['Caption']
-                except:
-                    doc.styles.add_style('Caption', WD_STYLE_TYPE.PARAGRAPH)
-                    paragraph.style = doc.styles['Caption']
-        # Save file with sorted filename
-        doc.save(os.path.join('Recommendations', 'Sorted', 'Add'+ str(index+1) + '.docx'))
+        reformat_rec(recDocs[row['File Name']], "Additional Recommendation "+ str(index+1) + ': ' + title_case(row['Description']))
     print("done")
 
-print("Parsing plant information...", end ="")
-
-## Compiler.json5 Calculations
-# Report date = today or 60 days after assessment, which ever is earlier
-VD = datetime.datetime.strptime(iac.VDATE, '%B %d, %Y')
-RDATE = min(datetime.datetime.today(), VD + datetime.timedelta(days=60))
-if platform.system() == 'Windows':
-    iac.RDATE = datetime.datetime.strftime(RDATE, '%B %#d, %Y')
-else: # macOS or Linux
-    iac.RDATE = datetime.datetime.strftime(RDATE, '%B %-d, %Y')
-
-# Sort participant and contributor name list
-iac.PARTlist.sort(key=lambda x: x.rsplit(' ', 1)[1])
-PART=""
-for name in iac.PARTlist:
-    PART  = PART + name + '\n'
-iac.PART = PART.rstrip('\n')
-iac.pop('PARTlist')
-
-iac.CONTlist.sort(key=lambda x: x.rsplit(' ', 1)[1])
-CONT=""
-for name in iac.CONTlist:
-    CONT  = CONT + name + '\n'
-iac.CONT = CONT.rstrip('\n')
-iac.pop('CONTlist')
-print("done")
-
-# products in different cases
-iac.PRODTitle = iac.PROD.title()
-iac.PRODlower = iac.PROD.lower()
-
-## Format strings
-# set electricity cost to 3 digits accuracy
-iac = dollar(['EC'],iac,3)
-# set the natural gas and demand to 2 digits accuracy
-iac = dollar(['DC', 'FC'],iac,2)
-# set the rest to integer
-varList = ['ACS', 'IC', 'TotalECost', 'TotalFCost', 'TotalCost']
-if hasAdditional:
-    varList.extend(['AddACS', 'AddIC'])
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
-
-## Load introduction template
-docIntro = Document(os.path.join('Report', 'Introduction.docx'))
-
-# Add rows to Recommendation table (Should be the 3rd table)
-print("Writing recommendation table...", end ="")
-locale._override_localeconv={'frac_digits':0}
-recTable = docIntro.tables[2]
-for index, row in recData.iterrows():
-    recRow = recTable.rows[index+1].cells
-    # Add ARC No.
-    recRow[0].text = 'Rec. ' + str(index+1) + '\n' + row['ARC No.']
-    recRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    # Add description
-    recRow[1].text = row['Description']
-    recRow[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-    # Add savings type
-    recRow[2].text = row['Savings Type']
-    recRow[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    # Add savings value
-    recRow[3].text = row['Savings Value']
-    recRow[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    # Add annual cost savings
-    recRow[4].text = locale.currency(row['Annual Cost Savings'], grouping=True)
-    recRow[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Add implementation cost
-    recRow[5].text = locale.currency(row['Implementation Cost'], grouping=True)
-    recRow[5].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Add payback period
-    pb = row['Payback Period']
-    if pb == 0:
-        recRow[6].text = "Immediate"
+    print("Combining all docs...", end ="")
+    # List of docs to combine, recommendations are reused from memory
+    docList = [Document(os.path.join('Report', 'ToC.docx'))]
+    for fileName in recData['File Name']:
+        docList.append(recDocs[fileName])
+    if hasAdditional:
+        docList.append(Document(os.path.join('Report', 'Add.docx')))
+        for fileName in addData['File Name']:
+            docList.append(recDocs[fileName])
     else:
-        recRow[6].text = str(math.ceil(pb * 10) / 10)
-    recRow[6].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Set 3pt before and after paragraph
-    for col in range(0,7):
-        recRow[col].paragraphs[0].paragraph_format.space_before = shared.Pt(3)
-        recRow[col].paragraphs[0].paragraph_format.space_after = shared.Pt(3)
-# Delete unused rows (Currectly row 1-15 are empty)
-for index in reversed(range(len(recData), 15)):
-    recTable._tbl.remove(recTable.rows[index+1]._tr)
-print("done")
-
-if hasAdditional:
-    # Add rows to additional recommendation table (Should be the 4th table)
-    print("Writing Additional Recommendation table...", end ="")
-    locale._override_localeconv={'frac_digits':0}
-    addTable = docIntro.tables[3]
-    for index, row in addData.iterrows():
-        addRow = addTable.rows[index+1].cells
-        # Add ARC No.
-        addRow[0].text = 'Add. Rec. ' + str(index+1) + '\n' + row['ARC No.']
-        addRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        # Add description
-        addRow[1].text = row['Description']
-        addRow[1].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-        # Add savings type
-        addRow[2].text = row['Savings Type']
-        addRow[2].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        # Add savings value
-        addRow[3].text = row['Savings Value']
-        addRow[3].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-        # Add annual cost savings
-        addRow[4].text = locale.currency(row['Annual Cost Savings'], grouping=True)
-        addRow[4].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        # Add implementation cost
-        addRow[5].text = locale.currency(row['Implementation Cost'], grouping=True)
-        addRow[5].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        # Add payback period
-        pb = row['Payback Period']
-        addRow[6].text = str(math.ceil(pb * 10) / 10)
-        addRow[6].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Set 3pt before and after paragraph
-    for col in range(0,7):
-        addRow[col].paragraphs[0].paragraph_format.space_before = shared.Pt(3)
-        addRow[col].paragraphs[0].paragraph_format.space_after = shared.Pt(3)
-    # Delete unused rows (Currectly row 1-5 are empty)
-    for index in reversed(range(len(addData), 5)):
-        addTable._tbl.remove(addTable.rows[index+1]._tr)
+        pass
+    docList.append(Document(filenameBackground))
+    # Description.docx was already parsed when checking for changes
+    docList.append(docTest)
+
+    # Combine all docx files
+    from docxcompose.composer import Composer
+    master = Document(filenameIntro)
+    master.add_page_break()
+    composer = Composer(master)
+    for doc_add in docList:
+        doc_add.add_page_break()
+        composer.append(doc_add)
+    # A section break is already added in BestPractice.docx, so no need to add a page break
+    composer.append(Document(os.path.join('Report', 'BestPractice.docx')))
+    composer.append(Document(filenameEnergy))
     print("done")
-else:
-    # delete this table
-    docIntro._body._body.remove(docIntro.tables[3]._tbl)
-
-# Remove Add blocks if no Additional
-docx_blocks(docIntro, ADD = hasAdditional)
-
-# Replacing keys
-print("Replacing keys in introduction...", end ="")
-docx_replace(docIntro, **iac)
-print("done")
-
-# Save introduction
-filenameIntro = iac.LE + '-intro.docx'
-docIntro.save(filenameIntro)
-
-## Load backgroud template
-docBackground = Document(os.path.join('Report', 'Background.docx'))
-
-# Replacing keys
-print("Replacing keys in background...", end ="")
-docx_replace(docBackground, **iac)
-print("done")
-
-# Save background
-filenameBackground = iac.LE + '-back.docx'
-docBackground.save(filenameBackground)
-
-## Load energy bill analysis template
-docEnergy = Document(os.path.join('Report', 'Energy.docx'))
-
-# Add energy chart images
-print("Adding energy chart images...", end ="")
-# If on macOS
-if chartPath == os.path.join('Energy Charts', 'Energy Charts.fld'):
-    add_image(docEnergy, '#EUChart', os.path.join(chartPath, "image001.png"), shared.Inches(6))
-    add_image(docEnergy, '#ECChart', os.path.join(chartPath, "image004.png"), shared.Inches(6))
-    add_image(docEnergy, '#DUChart', os.path.join(chartPath, "image002.png"), shared.Inches(6))
-    add_image(docEnergy, '#DCChart', os.path.join(chartPath, "image005.png"), shared.Inches(6))
-    add_image(docEnergy, '#FUChart', os.path.join(chartPath, "image003.png"), shared.Inches(6))
-    add_image(docEnergy, '#FCChart', os.path.join(chartPath, "image006.png"), shared.Inches(6))
-    add_image(docEnergy, '#PieUChart', os.path.join(chartPath, "image007.png"), shared.Inches(6))
-    add_image(docEnergy, '#PieCChart', os.path.join(chartPath, "image008.png"), shared.Inches(6))
-    add_image(docEnergy, '#TotalChart', os.path.join(chartPath, "image009.png"), shared.Inches(9))
-# If on Windows
-elif chartPath == os.path.join('Energy Charts', 'Energy Charts_files'):
-    add_image(docEnergy, '#EUChart', os.path.join(chartPath, "image001.png"), shared.Inches(6))
-    add_image(docEnergy, '#ECChart', os.path.join(chartPath, "image002.png"), shared.Inches(6))
-    add_image(docEnergy, '#DUChart', os.path.join(chartPath, "image003.png"), shared.Inches(6))
-    add_image(docEnergy, '#DCChart', os.path.join(chartPath, "image005.png"), shared.Inches(6))
-    add_image(docEnergy, '#FUChart', os.path.join(chartPath, "image006.png"), shared.Inches(6))
-    add_image(docEnergy, '#FCChart', os.path.join(chartPath, "image007.png"), shared.Inches(6))
-    add_image(docEnergy, '#PieUChart', os.path.join(chartPath, "image009.png"), shared.Inches(6))
-    add_image(docEnergy, '#PieCChart', os.path.join(chartPath, "image011.png"), shared.Inches(6))
-    add_image(docEnergy, '#TotalChart', os.path.join(chartPath, "image013.png"), shared.Inches(9))
-print("done")
-
-# Fill in energy chart tables from Energy Charts.xlsx
-print("Adding energy chart tables...", end ="")
-# Read electricity table from B6 to I19
-edf = pd.read_excel(os.path.join('Energy Charts', 'Energy Charts.xlsx'), sheet_name="Raw Data", skiprows = 5, nrows=13, usecols = 'B:I')
-# Read fuel table from K6 to N19
-fdf = pd.read_excel(os.path.join('Energy Charts', 'Energy Charts.xlsx'), sheet_name="Raw Data", skiprows = 5, nrows=13, usecols = 'K:N')
-
-# Add rows to electricity table (Should be the 1st table)
-eTable = docEnergy.tables[0]
-for index, row in edf.iterrows():
-    eRow = eTable.rows[index+3].cells
-    # Add Month
-    eRow[0].text = edf.iloc[(index, 0)]
-    eRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for col in range(1,8):
-        # Add interger with thousand separator
-        eRow[col].text = locale.format_string('%d',round(edf.iloc[(index, col)]), grouping=True)
-        eRow[col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Bold the last row
-    if index == 12:
-        for col in range(0,8):
-            eRow[col].paragraphs[0].runs[0].bold = True
-
-# Add rows to fuel table (Should be the 2nd table)
-fTable = docEnergy.tables[1]
-for index, row in fdf.iterrows():
-    fRow = fTable.rows[index+3].cells
-    # Add Month
-    fRow[0].text = fdf.iloc[(index, 0)]
-    fRow[0].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    for col in range(1,4):
-        # Add interger with thousand separator
-        fRow[col].text = locale.format_string('%d',round(fdf.iloc[(index, col)]), grouping=True)
-        fRow[col].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    # Bold the last row
-    if index == 12:
-        for col in range(0,4):
-            fRow[col].paragraphs[0].runs[0].bold = True
-print("done")
-# Replacing keys
-print("Replacing keys in energy charts...", end ="")
-docx_replace(docEnergy, **iac)
-print("done")
-# Save energy charts
-filenameEnergy = iac.LE + '-energy.docx'
-docEnergy.save(filenameEnergy)
-
-print("Combining all docs...", end ="")
-# List of docs to combine
-docList = [os.path.join('Report', 'ToC.docx')]
-for RecLength in range(1, len(recData)+1):
-    docList.append(os.path.join('Recommendations', 'Sorted','Rec' + str(RecLength) + '.docx'))
-if hasAdditional:
-    docList.append(os.path.join('Report', 'Add.docx'))
-    for AddLength in range(1, len(addData)+1):
-        docList.append(os.path.join('Recommendations', 'Sorted','Add' + str(AddLength) + '.docx'))
-else:
-    pass
-docList.append(filenameBackground)
-docList.append(os.path.join('Report', 'Description.docx'))
-
-# Combine all docx files
-main = Document(filenameIntro)
-main.add_page_break()
-composer = Composer(main)
-for i in range(0, len(docList)):
-    doc_add = Document(docList[i])
-    doc_add.add_page_break()
-    composer.append(doc_add)
-# A section break is already added in BestPractice.docx, so no need to add a page break
-composer.append(Document(os.path.join('Report', 'BestPractice.docx')))
-composer.append(Document(filenameEnergy))
-filename = iac.LE +'.docx'
-composer.save(filename)
-
-# delete temp files
-os.remove(filenameIntro)
-os.remove(filenameBackground)
-os.remove(filenameEnergy)
-print("done")
-
-# Open the combined docx file
-doc = Document(filename)
-# Change the orientation of the last section to landscape
-section = doc.sections[-1]
-new_width, new_height = section.page_height, section.page_width
-section.orientation = WD_ORIENT.LANDSCAPE
-section.page_width = new_width
-section.page_height = new_height
-
-# Save final report
-doc.save(filename)
-print(filename + " is finished.")
-
-# Caveats
-caveat("Please select all (Ctrl+A) then refresh TWICE (F9) ToC, list of tables/figures.")
-
-if answer.lower() == 'y':
-    caveat("Please manually add Process Description, Major Equipment, Current Best Practices, and plant layout image.")
\ No newline at end of file
+
+    # Change the orientation of the last section to landscape
+    section = composer.doc.sections[-1]
+    new_width, new_height = section.page_height, section.page_width
+    section.orientation = WD_ORIENT.LANDSCAPE
+    section.page_width = new_width
+    section.page_height = new_height
+
+    # Save final report
+    composer.save(filename)
+    manifest['report'] = reportKey
+    save_cache('build', manifest)
+    print(filename + " is finished.")
+
+    final_caveats(answer)
+
+if __name__ == '__main__':
+    main()
@@ -2,48 +2,61 @@
 This script is used to generate the IAC recommendation for Exhuast Heat Compressors
 """
 
-import json5, sys, os
-from docx import Document
-from easydict import EasyDict
-from python_docx_replace import docx_replace, docx_blocks
-sys.path.append(os.path.join('..', '..')) 
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
-
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
-
-## Calculations
-# Operating hours
-iac.OH = iac.HR * iac.DY * iac.WK
-
-## Savings
-# Natural Gas Savings
-iac.NGS = round(iac.HP * iac.FR/100 * iac.EC/100 * 0.002544 * iac.EHR/100 * iac.OH)
-# Annual Cost Savigns
-iac.ACS = round(iac.NGS * iac.NGC)
-## Rebate
-iac.PB = payback(iac.ACS, iac.IC)
-
-## Format strings
-# set to 2 digits accuracy
-iac = dollar(['NGC'],iac,2)
-# set the rest to integer
-varList = ['ACS', 'IC']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
-
-# Import docx template
-doc = Document('template.docx')
-
-# Replacing keys
-docx_replace(doc, **iac)
-
-savefile(doc, iac.REC)
-
-# Caveats
-caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
+from copy import deepcopy
+
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    iac = deepcopy(inputs)
+    ## Calculations
+    # Operating hours
+    iac.OH = iac.HR * iac.DY * iac.WK
+
+    ## Savings
+    # Natural Gas Savings
+    iac.NGS = round(iac.HP * iac.FR/100 * iac.EC/100 * 0.002544 * iac.EHR/100 * iac.OH)
+    # Annual Cost Savigns
+    iac.ACS = round(iac.NGS * iac.NGC)
+    ## Rebate
+    iac.PB = payback(iac.ACS, iac.IC)
+    return iac
+
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    from docx import Document
+    iac = deepcopy(results)
+    ## Format strings
+    # set to 2 digits accuracy
+    iac = dollar(['NGC'],iac,2)
+    # set the rest to integer
+    varList = ['ACS', 'IC']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
+
+    # Import docx template
+    doc = Document(os.path.join(FOLDER, 'template.docx'))
+
+    # Replacing keys
+    replace_tags(doc, iac)
+    return doc
+
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC))
+
+    # Caveats
+    caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
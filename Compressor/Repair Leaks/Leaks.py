@@ -0,0 +1,123 @@
+"""
+Compressed air leak model over any leak sizes and compressor systems
+Leaks are binned by compressor system and diameter, then flow rate, power, demand, energy and cost
+are computed as system x size matrices in one pass.
+"""
+
+# Leak sizes of NL1 to NL6 in the database, inches
+SIZES = ["1/64", "1/32", "1/16", "1/8", "3/16", "1/4"]
+# Compressor keys, the top level value is the default of every system
+SYSTEM_KEYS = ['P0', 'P1', 'T0', 'T1', 'EA', 'EM', 'N', 'CF', 'HR', 'DY', 'WK', 'LL']
+
+def diameter(size) -> float:
+    """
+    Parse a leak diameter
+    :param size: Diameter in inches, e.g. "3/16", "0.1" or 0.1
+    :return: Diameter in inches, float
+    """
+    from fractions import Fraction
+    try:
+        return float(Fraction(str(size).strip()))
+    except (ValueError, ZeroDivisionError):
+        raise Exception("Invalid leak diameter " + str(size) + ".")
+
+def systems(iac: dict) -> list:
+    """
+    Compressor table of the database
+    :param iac: EasyDict of the database, SYSTEMS is an optional list of systems with an ID and keys that differ
+    :return: List of dictionaries with ID and SYSTEM_KEYS
+    """
+    default = {key: iac[key] for key in SYSTEM_KEYS}
+    if 'SYSTEMS' not in iac:
+        return [dict(default, ID="")]
+    table = []
+    for system in iac.SYSTEMS:
+        if 'ID' not in system:
+            raise Exception("Every compressor system needs an ID.")
+        table.append(dict(default, **system))
+    IDs = [system['ID'] for system in table]
+    if len(set(IDs)) != len(IDs):
+        raise Exception("Compressor system IDs must be unique.")
+    return table
+
+def leak_list(iac: dict) -> list:
+    """
+    Leak table of the database
+    :param iac: EasyDict of the database, LEAKLIST is an optional list of [size, count, system ID]
+    :return: List of (size, count, system ID), the system ID is "" for a single system
+    """
+    if 'LEAKLIST' not in iac:
+        return [(size, iac['NL' + str(i + 1)], "") for i, size in enumerate(SIZES)]
+    table = []
+    for row in iac.LEAKLIST:
+        if len(row) not in (2, 3):
+            raise Exception("Leaks must be [size, count] or [size, count, system ID], got " + str(row) + ".")
+        table.append((row[0], row[1], row[2] if len(row) == 3 else ""))
+    return table
+
+def leak_model(leaks: list, systems: list, EC: float, DC: float) -> dict:
+    """
+    Compute the leak losses of every system and size
+    :param leaks: List of (size, count, system ID)
+    :param systems: List of dictionaries with ID and SYSTEM_KEYS
+    :param EC: Electricity cost, $/kWh
+    :param DC: Demand cost, $/kW
+    :return: EasyDict of system IDs and locations (S), sizes (D), S x D matrices and aggregates by system and size
+    """
+    import numpy as np
+    from easydict import EasyDict
+    # Constants
+    PA = 14.7 # Atmosphere, psia
+    C1 = 28.37 # Isentropic sonic volumetric flow constant
+    C2 = 60.0 # Conversion constant; sec/min
+    C3 = 144.0 # Conversion constant; in2/ft2
+    C4 = 3.03e-5 # Conversion constant; HP.min/ft.lb
+    C5 = 0.746 # Conversion factor; kW/HP
+    CD = 0.8 # Coefficient of discharge for square edged orifice
+    k = 1.4 # Specific heat ratio of air
+
+    # Compressor table as columns
+    IDs = [system['ID'] for system in systems]
+    col = {key: np.array([system[key] for system in systems]) for key in SYSTEM_KEYS if key != 'LL'}
+    # Leak sizes sorted by diameter, the first name of a diameter is kept
+    names = {}
+    for size, count, ID in leaks:
+        names.setdefault(diameter(size), str(size))
+    LD = np.array(sorted(names))
+    LS = [names[d] for d in LD]
+    # Number of leaks by system and size
+    NL = np.zeros((len(IDs), LD.size), dtype=int)
+    for size, count, ID in leaks:
+        if ID not in IDs:
+            raise Exception("Leak of " + str(size) + " inch refers to unknown compressor system " + str(ID) + ".")
+        if count < 0 or count != int(count):
+            raise Exception("Number of leaks must be a positive integer, got " + str(count) + ".")
+    rows = [IDs.index(ID) for size, count, ID in leaks]
+    cols = np.searchsorted(LD, [diameter(size) for size, count, ID in leaks])
+    np.add.at(NL, (rows, cols), [int(count) for size, count, ID in leaks])
+
+    # Per system, S
+    OH = col['HR'] * col['DY'] * col['WK']
+    VF0 = np.pi / 4 * (col['T0'] + 460) * col['P1'] / PA * C1 * C2 * CD / C3 / np.sqrt(col['T1'] + 460)
+    N = col['N'][:, None]
+    # Flow rate (cfm)
+    FR = LD * LD * VF0[:, None]
+    # Power Loss (hp)
+    PL = PA * C3 * FR * k/(k-1.0) * N * C4 * \
+        (np.power(col['P0'][:, None]/PA,(k-1.0)/(k*N)) - 1.0) / ((col['EA'][:, None]/100) * (col['EM'][:, None]/100))
+    # Demand Loss (kW/yr)
+    DL = PL * C5 * (col['CF'][:, None]/100) * 12
+    # Energy Loss (kWh/yr)
+    EL = PL * C5 * OH[:, None]
+    # Leak Cost ($/yr)
+    LC = DL * DC + EL * EC
+    # Savings of repairing all leaks
+    DS = NL * DL
+    ES = NL * EL
+    CS = NL * LC
+    model = EasyDict(ID=IDs, LL=[system['LL'] for system in systems], LS=LS, LD=LD, OH=OH, VF0=VF0,
+                     NL=NL, FR=FR, PL=PL, DL=DL, EL=EL, LC=LC, DS=DS, ES=ES, CS=CS)
+    # Aggregates for the report tables
+    model.BYSIZE = EasyDict({key: model[key].sum(axis=0) for key in ['NL', 'DS', 'ES', 'CS']})
+    model.BYSYSTEM = EasyDict({key: model[key].sum(axis=1) for key in ['NL', 'DS', 'ES', 'CS']})
+    return model
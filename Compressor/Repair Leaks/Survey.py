@@ -0,0 +1,121 @@
+"""
+Import a leak survey exported from an ultrasonic leak detector, as CSV or XLSX
+The survey is read row by row and tallied by diameter class and compressor system, so memory does not grow
+with the number of leaks. Set SURVEY in database.json5 to use it, or run this script to print the tally:
+python Survey.py survey.csv
+"""
+
+import Leaks
+
+# Column names, case insensitive, the first one found is used
+SIZE_COLUMNS = ['diameter', 'hole diameter', 'leak diameter', 'size', 'hole size', 'leak size']
+SYSTEM_COLUMNS = ['system', 'compressor', 'system id', 'compressor id']
+COUNT_COLUMNS = ['count', 'quantity', 'number of leaks', 'leaks']
+
+def read_rows(path: str):
+    """
+    Read a CSV or XLSX file row by row
+    :param path: Path to the survey file
+    :return: Generator of rows as lists, the first row is the header
+    """
+    import os
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        import csv
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f)
+    elif extension in ('.xlsx', '.xlsm'):
+        import openpyxl
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in wb.worksheets[0].iter_rows(values_only=True):
+                yield ['' if value is None else value for value in row]
+        finally:
+            wb.close()
+    else:
+        raise Exception("Leak survey must be a .csv or .xlsx file: " + path)
+
+def find_column(header: list, names: list):
+    """
+    Find a column by name
+    :param header: List of column names
+    :param names: List of accepted names, lower case
+    :return: Column index, None if not found
+    """
+    header = [str(name).strip().lower() for name in header]
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+def cell(row: list, column) -> str:
+    """
+    Read a cell of a row
+    :param row: List of values
+    :param column: Column index, None if the column doesn't exist
+    :return: Value as stripped string, empty if missing
+    """
+    if column is None or column >= len(row):
+        return ''
+    return str(row[column]).strip()
+
+def tally(path: str, classes: list=Leaks.SIZES, IDs: list=None) -> list:
+    """
+    Count the leaks of a survey by diameter class and compressor system
+    :param path: Path to the survey file
+    :param classes(optional): List of diameter classes, every leak is binned to the nearest one
+    :param IDs(optional): List of compressor system IDs, a single system takes every leak
+    :return: List of (size, count, system ID) for Leaks.leak_model
+    """
+    rows = read_rows(path)
+    header = next(rows, None)
+    if header is None:
+        raise Exception("Leak survey " + path + " is empty.")
+    size = find_column(header, SIZE_COLUMNS)
+    if size is None:
+        raise Exception("Leak survey " + path + " needs a diameter column, one of: " + ", ".join(SIZE_COLUMNS))
+    system = find_column(header, SYSTEM_COLUMNS)
+    count = find_column(header, COUNT_COLUMNS)
+    single = IDs is not None and len(IDs) == 1
+    if system is None and not single and IDs is not None:
+        raise Exception("Leak survey " + path + " needs a system column, one of: " + ", ".join(SYSTEM_COLUMNS))
+    diameters = [Leaks.diameter(c) for c in classes]
+    # Diameter class of every size found in the survey
+    nearest = {}
+    counts = {}
+    for line, row in enumerate(rows, start=2):
+        value = cell(row, size)
+        # Skip blank lines
+        if value == '':
+            continue
+        try:
+            if value not in nearest:
+                d = Leaks.diameter(value)
+                nearest[value] = classes[min(range(len(classes)), key=lambda i: abs(diameters[i] - d))]
+            key = (nearest[value], IDs[0] if single else cell(row, system))
+            n = float(cell(row, count) or 1)
+            if n < 0 or n != int(n):
+                raise Exception("Number of leaks must be a positive integer, got " + cell(row, count) + ".")
+            n = int(n)
+        except Exception as error:
+            raise Exception("Leak survey " + path + ", row " + str(line) + ": " + str(error))
+        counts[key] = counts.get(key, 0) + n
+    unknown = sorted(set(ID for _, ID in counts) - set(IDs or []))
+    if IDs is not None and unknown:
+        raise Exception("Leak survey " + path + " refers to unknown compressor systems: " + ", ".join(map(repr, unknown)))
+    # Every class of every system, in order
+    if IDs is None:
+        IDs = sorted(set(ID for _, ID in counts)) or [""]
+    return [(c, counts.get((c, ID), 0), ID) for ID in IDs for c in classes]
+
+def main():
+    import sys, json
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        return
+    leaks = [list(leak) for leak in tally(sys.argv[1]) if leak[1] > 0]
+    print("Total leaks: " + str(sum(leak[1] for leak in leaks)))
+    print("LEAKLIST: " + json.dumps(leaks) + ",")
+
+if __name__ == '__main__':
+    main()
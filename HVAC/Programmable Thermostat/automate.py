@@ -2,80 +2,129 @@
 This script is used to generate the IAC recommendation for Install programmable thermostats
 """
 
-import json5, sys, os
-from docx import Document
-from easydict import EasyDict
-from python_docx_replace import docx_replace, docx_blocks
-sys.path.append(os.path.join('..', '..'))
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
+from copy import deepcopy
 
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+# Degree hours that can be computed from the hourly temperatures
+DEGREE_HOURS = ['CDH', 'MCDH', 'HDH', 'MHDH']
 
-# Constants
-C1 = 12000.0 # Conversion constant; 12,000 BTU/hr/ton
-C2 = 1000.0 # Conversion constant; kW/W
-# Calculations
-iac.PD = round(iac.TON * C1 * (iac.PA/100) * (iac.LF/100) / (iac.EER * C2))
-iac.OHE = iac.CHR * iac.CWK
-iac.OHO = iac.OHR * iac.OWK
-iac.ES = round(iac.PD * (iac.OHE - iac.OHO) * (1 - iac.MCDH / iac.CDH))
-iac.NGS = round(iac.NGU * (1 - iac.MHDH / iac.HDH))
-if iac.COOL == True:
-    iac.ECS = round(iac.ES * iac.EC)
-else:
-    iac.ECS = 0
-if iac.HEAT == True:
-    iac.NGCS = round(iac.NGS * iac.NGC)
-else:
-    iac.NGCS = 0
-iac.ACS = iac.ECS + iac.NGCS
-# Implementation
-iac.MC = iac.PT * iac.NT
-iac.LB = round(iac.NT * iac.IT * iac.LR)
-iac.IC = iac.MC + iac.LB
-iac.PB = payback(iac.ACS, iac.IC)
-## Format strings
-# set electricity cost to 3 digits accuracy
-iac = dollar(['EC'],iac,3)
-# set the natural gas and demand to 2 digits accuracy
-iac = dollar(['NGC', 'DC'],iac,2)
-# set the rest to integer
-varList = ['LR', 'PT', 'LB', 'MC', 'IC', 'ECS', 'NGCS', 'ACS']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    iac = deepcopy(inputs)
+    # Constants
+    C1 = 12000.0 # Conversion constant; 12,000 BTU/hr/ton
+    C2 = 1000.0 # Conversion constant; kW/W
+    # Calculations
+    iac.PD = round(iac.TON * C1 * (iac.PA/100) * (iac.LF/100) / (iac.EER * C2))
+    iac.OHE = iac.CHR * iac.CWK
+    iac.OHO = iac.OHR * iac.OWK
+    ## Degree hours from the database, computed from the hourly temperature profile if null
+    if any(iac.get(key) is None for key in DEGREE_HOURS):
+        computed = profile_degree_hours(iac)
+        for key in DEGREE_HOURS:
+            if iac.get(key) is None:
+                iac[key] = computed[key]
+    # No savings if the set temperature is never reached
+    iac.ES = round(iac.PD * (iac.OHE - iac.OHO) * (1 - iac.MCDH / iac.CDH)) if iac.CDH > 0 else 0
+    iac.NGS = round(iac.NGU * (1 - iac.MHDH / iac.HDH)) if iac.HDH > 0 else 0
+    if iac.COOL == True:
+        iac.ECS = round(iac.ES * iac.EC)
+    else:
+        iac.ECS = 0
+    if iac.HEAT == True:
+        iac.NGCS = round(iac.NGS * iac.NGC)
+    else:
+        iac.NGCS = 0
+    iac.ACS = iac.ECS + iac.NGCS
+    # Implementation
+    iac.MC = iac.PT * iac.NT
+    iac.LB = round(iac.NT * iac.IT * iac.LR)
+    iac.IC = iac.MC + iac.LB
+    iac.PB = payback(iac.ACS, iac.IC)
+    return iac
 
-# Import docx template
-doc = Document('template.docx')
+def profile_degree_hours(inputs: dict) -> dict:
+    """
+    Degree hours of the current and modified schedules from the hourly temperatures of the ZIP code
+    :param inputs: EasyDict with ZIP, schedules and set temperatures
+    :return: Dictionary with CDH, MCDH, HDH and MHDH
+    """
+    import numpy as np
+    from Shared.Weather import hourly_temperature
+    from Shared.DegreeHours import weekly_schedule, degree_hours
+    iac = inputs
+    temps = hourly_temperature(iac.ZIP)
+    # Set temperatures are currently held during these hours
+    current = weekly_schedule(iac.CHR, iac.CWK)
+    # and will only be held when occupied, setback otherwise
+    occupied = np.minimum(weekly_schedule(iac.OHR, iac.OWK), current)
+    setback = current - occupied
+    # Cooling during setback hours, heating all year
+    setpoints = np.array([[iac.CST], [iac.MCST], [iac.HST], [iac.HST], [iac.MHST]])
+    weights = np.array([setback, setback, current, occupied, setback])
+    cooling, heating = degree_hours(temps, setpoints, weights)
+    return {'CDH': round(cooling[0].item()),
+            'MCDH': round(cooling[1].item()),
+            'HDH': round(heating[2].item()),
+            'MHDH': round((heating[3] + heating[4]).item())}
 
-# Replacing keys
-docx_replace(doc, **iac)
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    from docx import Document
+    from python_docx_replace import docx_blocks
+    iac = deepcopy(results)
+    ## Format strings
+    # set electricity cost to 3 digits accuracy
+    iac = dollar(['EC'],iac,3)
+    # set the natural gas and demand to 2 digits accuracy
+    iac = dollar(['NGC', 'DC'],iac,2)
+    # set the rest to integer
+    varList = ['LR', 'PT', 'LB', 'MC', 'IC', 'ECS', 'NGCS', 'ACS']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
 
-# If both false
-if iac.COOL == False and iac.HEAT == False:
-    raise Exception("You need to have at least one section enabled")
-# If both true
-if iac.COOL and iac.HEAT:
-    iac.DOUBLE = True
-else:
-    iac.DOUBLE = False
-# Remove table row
-summary = doc.tables[0]
-if iac.COOL == False:
-    summary._tbl.remove(summary.rows[3]._tr)
-if iac.HEAT == False:
-    summary._tbl.remove(summary.rows[4]._tr)
+    # Import docx template
+    doc = Document(os.path.join(FOLDER, 'template.docx'))
 
-docx_blocks(doc, COOL = iac.COOL)
-docx_blocks(doc, HEAT = iac.HEAT)
-docx_blocks(doc, DOUBLE = iac.DOUBLE)
+    # Replacing keys
+    replace_tags(doc, iac)
 
-savefile(doc, iac.REC)
+    # If both false
+    if iac.COOL == False and iac.HEAT == False:
+        raise Exception("You need to have at least one section enabled")
+    # If both true
+    if iac.COOL and iac.HEAT:
+        iac.DOUBLE = True
+    else:
+        iac.DOUBLE = False
+    # Remove table row
+    summary = doc.tables[0]
+    if iac.COOL == False:
+        summary._tbl.remove(summary.rows[3]._tr)
+    if iac.HEAT == False:
+        summary._tbl.remove(summary.rows[4]._tr)
 
-# Caveats
-caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
+    docx_blocks(doc, COOL = iac.COOL)
+    docx_blocks(doc, HEAT = iac.HEAT)
+    docx_blocks(doc, DOUBLE = iac.DOUBLE)
+    return doc
+
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC))
+
+    # Caveats
+    caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
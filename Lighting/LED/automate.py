@@ -2,156 +2,147 @@
 This script is used to generate the IAC recommendation for Switch to LED lighting.
 """
 
-import json5, sys, os, num2words
-from docx import Document
-from easydict import EasyDict
-from python_docx_replace import docx_replace, docx_blocks
-sys.path.append(os.path.join('..', '..')) 
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
-from docxcompose.composer import Composer
-import numpy as np
-
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
-
-# Validate the length of all lists
-N = iac.N
-for i in iac:
-    if isinstance(iac[i], list):
-        # If the length is not N, throw an error
-        if len(iac[i]) != N:
-            raise Exception('Length of {0} is not {1}.'.format(i, N))
-
-# Calculations
-# Covert to numpy array for element-wise operations
-nplist = ['CN', 'CPR', 'PN', 'PPR', 'HR', 'DY', 'WK', 'BP', 'BL', 'CF']
-for i in nplist:
-    iac[i] = np.array(iac[i])
-
-# Calculate operating hours
-iac.OH = iac.HR * iac.DY * iac.WK
-# Calculate electricity savings
-iac.ESi = np.rint(((iac.CN * iac.CPR - iac.PN * iac.PPR) * iac.OH) / 1000.0).astype(np.int64)
-iac.ES = np.sum(iac.ESi)
-iac.ECS = np.rint(iac.ES * iac.EC).astype(np.int64)
-# Calculate demand savings
-iac.DSi = np.rint((iac.CN * iac.CPR - iac.PN * iac.PPR) * (iac.CF/100) * 12.0 / 1000.0).astype(np.int64)
-iac.DS = np.sum(iac.DSi)
-iac.DCS = np.rint(iac.DS * iac.DC).astype(np.int64)
-
-# Calculate bulb cost
-iac.BCi = np.rint(iac.PN * iac.BP).astype(np.int64)
-iac.BC = np.sum(iac.BCi)
-# Calculate labor cost
-iac.LCi = np.rint(iac.CN * iac.BL).astype(np.int64)
-iac.LC = np.sum(iac.LCi)
-# Calculate implementation cost
-iac.LN = np.sum(iac.CN)
-iac.IC = iac.BC + iac.LC
-iac.ACS = iac.ECS + iac.DCS
-
-# Rebate
-iac = rebate(iac)
-
-# Combine words
-iac.AREAS = combine_words(iac.AREA)
-# Take an example of the previous area
-iac.PREV1 = iac.PREV[0]
-
-## Format strings
-# set electricity cost / rebate to 3 digits accuracy
-iac = dollar(['EC', 'ERR'],iac,3)
-# set the natural gas and demand to 2 digits accuracy
-iac = dollar(['NGC', 'DC'],iac,2)
-# set the rest to integer
-varList = ['LR', 'ECS', 'DCS', 'ACS', 'BC', 'LC', 'IC', 'RB', 'MRB', 'MIC']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
-
-# Create document for each area
-for i in range(N):
-    iacsub = EasyDict()
-    iacsub.i = str(i+1)
-    # For any list or ndarray in iac, add corresponding values to iacsub
-    for j in iac:
-       if isinstance(iac[j], list) or isinstance(iac[j], np.ndarray):
-           iacsub[j] = iac[j][i]
-
-    # Import individual area template
-    doc = Document('template 2.docx')
-
+from copy import deepcopy
+
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    import numpy as np
+    iac = deepcopy(inputs)
+    # Validate the length of all lists
+    N = iac.N
+    for i in iac:
+        if isinstance(iac[i], list):
+            # If the length is not N, throw an error
+            if len(iac[i]) != N:
+                raise Exception('Length of {0} is not {1}.'.format(i, N))
+
+    # Calculations
+    # Covert to numpy array for element-wise operations
+    nplist = ['CN', 'CPR', 'PN', 'PPR', 'HR', 'DY', 'WK', 'BP', 'BL', 'CF']
+    for i in nplist:
+        iac[i] = np.array(iac[i])
+
+    # Calculate operating hours
+    iac.OH = iac.HR * iac.DY * iac.WK
+    # Calculate electricity savings
+    iac.ESi = np.rint(((iac.CN * iac.CPR - iac.PN * iac.PPR) * iac.OH) / 1000.0).astype(np.int64)
+    iac.ES = np.sum(iac.ESi)
+    iac.ECS = np.rint(iac.ES * iac.EC).astype(np.int64)
+    # Calculate demand savings
+    iac.DSi = np.rint((iac.CN * iac.CPR - iac.PN * iac.PPR) * (iac.CF/100) * 12.0 / 1000.0).astype(np.int64)
+    iac.DS = np.sum(iac.DSi)
+    iac.DCS = np.rint(iac.DS * iac.DC).astype(np.int64)
+
+    # Calculate bulb cost
+    iac.BCi = np.rint(iac.PN * iac.BP).astype(np.int64)
+    iac.BC = np.sum(iac.BCi)
+    # Calculate labor cost
+    iac.LCi = np.rint(iac.CN * iac.BL).astype(np.int64)
+    iac.LC = np.sum(iac.LCi)
+    # Calculate implementation cost
+    iac.LN = np.sum(iac.CN)
+    iac.IC = iac.BC + iac.LC
+    iac.ACS = iac.ECS + iac.DCS
+
+    # Rebate
+    iac = rebate(iac)
+
+    # Combine words
+    iac.AREAS = combine_words(iac.AREA)
+    # Take an example of the previous area
+    iac.PREV1 = iac.PREV[0]
+    return iac
+
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    import numpy as np
+    import num2words
+    from docx import Document
+    from docxcompose.composer import Composer
+    from python_docx_replace import docx_blocks
+    iac = deepcopy(results)
+    # Number of areas
+    N = iac.N
+    ## Format strings
+    # set electricity cost / rebate to 3 digits accuracy
+    iac = dollar(['EC', 'ERR'],iac,3)
+    # set the natural gas and demand to 2 digits accuracy
+    iac = dollar(['NGC', 'DC'],iac,2)
+    # set the rest to integer
+    varList = ['LR', 'ECS', 'DCS', 'ACS', 'BC', 'LC', 'IC', 'RB', 'MRB', 'MIC']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
+
+    # Import opening template
+    doc = Document(os.path.join(FOLDER, 'template 1.docx'))
     # Replacing keys
-    docx_replace(doc, **iacsub)
-    # Save file as temp{i}.docx
-    doc.save('tmp'+iacsub.i+'.docx')
-
-# Import opening template
-doc = Document('template 1.docx')
-# Replacing keys
-docx_replace(doc, **iac)
-# Save file as temp0.docx
-doc.save('tmp0.docx')
-
-# Assemble ESSum and ESSum
-iac.ESSum = iac.ESi[0] + ' kWh/yr'
-iac.DSSum = iac.DSi[0] + ' kW/yr'
-for i in range(1,N):
-    iac.ESSum += ' + ' + iac.ESi[i] + ' kWh/yr'
-    iac.DSSum += ' + ' + iac.DSi[i] + ' kW/yr'
-
-# Import ending template
-doc = Document('template 3.docx')
-# Rebate block
-docx_blocks(doc, REBATE = iac.REB)
-# Multi areas block
-if N == 1:
-    docx_blocks(doc, single = True)
-    docx_blocks(doc, multi = False)
-else:
-    docx_blocks(doc, single = False)
-    docx_blocks(doc, multi = True)
-iac.INSTALL = []
-# get the index of unique PPR
-unique, ind = np.unique(iac.PPR, return_index=True)
-# deduplicate PPR
-for i in ind:
-    # distinguish a/an
-    vowel = num2words.num2words(iac.PPR[i])
-    if vowel[0] in ['a', 'e', 'i', 'o', 'u']:
-        tmpstr = "an"
+    replace_tags(doc, iac)
+    # Combine all documents in memory
+    composer = Composer(doc)
+
+    # Create document for each area
+    compose_areas(composer, os.path.join(FOLDER, 'template 2.docx'), iac, N)
+
+    # Assemble ESSum and ESSum
+    iac.ESSum = iac.ESi[0] + ' kWh/yr'
+    iac.DSSum = iac.DSi[0] + ' kW/yr'
+    for i in range(1,N):
+        iac.ESSum += ' + ' + iac.ESi[i] + ' kWh/yr'
+        iac.DSSum += ' + ' + iac.DSi[i] + ' kW/yr'
+
+    # Import ending template
+    doc = Document(os.path.join(FOLDER, 'template 3.docx'))
+    # Rebate block
+    docx_blocks(doc, REBATE = iac.REB)
+    # Multi areas block
+    if N == 1:
+        docx_blocks(doc, single = True)
+        docx_blocks(doc, multi = False)
     else:
-        tmpstr = "a"
-    tmpstr += f" {iac.PPR[i]} W LED bulb "
-    tmpstr += f"costs about ${iac.BP[i]} plus "
-    tmpstr += f"${iac.BL[i]} labor to install"
-    # captialize the first letter of the first sentence
-    if i==0:
-        tmpstr = tmpstr[0].capitalize() + tmpstr[1:]
-    iac.INSTALL.append(tmpstr)
-iac.INSTALL = combine_words(iac.INSTALL)
-# Replacing keys
-docx_replace(doc, **iac)
-# Save file as temp{N+1}.docx
-doc.save('tmp'+str(N+1)+'.docx')
-
-# Combine all docx files
-master = Document("tmp0.docx")
-composer = Composer(master)
-for i in range(N+1):
-    doc_tmp = Document('tmp'+str(i+1)+'.docx')
-    composer.append(doc_tmp)
-
-savefile(composer, str(iac.REC))
+        docx_blocks(doc, single = False)
+        docx_blocks(doc, multi = True)
+    iac.INSTALL = []
+    # get the index of unique PPR
+    unique, ind = np.unique(iac.PPR, return_index=True)
+    # deduplicate PPR
+    for i in ind:
+        # distinguish a/an
+        vowel = num2words.num2words(iac.PPR[i])
+        if vowel[0] in ['a', 'e', 'i', 'o', 'u']:
+            tmpstr = "an"
+        else:
+            tmpstr = "a"
+        tmpstr += f" {iac.PPR[i]} W LED bulb "
+        tmpstr += f"costs about ${iac.BP[i]} plus "
+        tmpstr += f"${iac.BL[i]} labor to install"
+        # captialize the first letter of the first sentence
+        if i==0:
+            tmpstr = tmpstr[0].capitalize() + tmpstr[1:]
+        iac.INSTALL.append(tmpstr)
+    iac.INSTALL = combine_words(iac.INSTALL)
+    # Replacing keys
+    replace_tags(doc, iac)
+    composer.append(doc)
+    return composer.doc
 
-# delete temp files
-for i in range(N+2):
-    filename = 'tmp'+str(i)+'.docx'
-    os.remove(filename)
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC))
 
-# Caveats
-caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
+    # Caveats
+    caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
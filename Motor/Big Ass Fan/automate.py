@@ -2,76 +2,91 @@
 This script is used to generate the IAC recommendation for Industrial fans to improve air circulation
 """
 
-import json5, sys, os, num2words
-from docx import Document
-from easydict import EasyDict
-from python_docx_replace import docx_replace, docx_blocks
-sys.path.append(os.path.join('..', '..')) 
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
+from copy import deepcopy
 
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
 
-## Constants
-# Conversion constant
-C1 = 0.7457
-# Coincidence factor, %
-CF = 100
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    iac = deepcopy(inputs)
+    ## Constants
+    # Conversion constant
+    C1 = 0.7457
+    # Coincidence factor, %
+    CF = 100
 
-## Calculations
-# Operating hours
-iac.OH = iac.HR * iac.DY * iac.WK
+    ## Calculations
+    # Operating hours
+    iac.OH = iac.HR * iac.DY * iac.WK
 
-## Savings
-# Natural Gas Savings
-iac.NGS = iac.PR/100 * iac.NGU
-# Extra electricity consumption
-iac.ES = round(-(iac.FAN) * iac.HP * C1 * iac.OH)
-# Extra demand consumption
-iac.DS = round(-(iac.FAN) * iac.HP * C1 * 6 * CF/100, 1)
-# Natual Gas cost savings
-iac.NGCS = round(iac.NGS * iac.NGC)
-# Electricity cost savings
-iac.ECS = round(iac.ES * iac.EC)
-# Demand cost savings
-iac.DCS = round(iac.DS * iac.DC)
-# Annual cost savings
-iac.ACS = iac.NGCS + iac.ECS + iac.DCS
+    ## Savings
+    # Natural Gas Savings
+    iac.NGS = iac.PR/100 * iac.NGU
+    # Extra electricity consumption
+    iac.ES = round(-(iac.FAN) * iac.HP * C1 * iac.OH)
+    # Extra demand consumption
+    iac.DS = round(-(iac.FAN) * iac.HP * C1 * 6 * CF/100, 1)
+    # Natual Gas cost savings
+    iac.NGCS = round(iac.NGS * iac.NGC)
+    # Electricity cost savings
+    iac.ECS = round(iac.ES * iac.EC)
+    # Demand cost savings
+    iac.DCS = round(iac.DS * iac.DC)
+    # Annual cost savings
+    iac.ACS = iac.NGCS + iac.ECS + iac.DCS
 
-## Rebate
-# Total fan cost
-iac.IC = iac.FAN * iac.COST
-iac.PB = payback(iac.ACS, iac.IC)
+    ## Rebate
+    # Total fan cost
+    iac.IC = iac.FAN * iac.COST
+    iac.PB = payback(iac.ACS, iac.IC)
 
-iac = rebate(iac)
+    iac = rebate(iac)
+    return iac
 
-## Format strings
-# Convert to word
-iac.FANStr = num2words.num2words(iac.FAN)
-# set electricity cost / rebate to 3 digits accuracy
-iac = dollar(['EC'],iac,3)
-# set demand to 2 digits accuracy
-iac = dollar(['DC', 'NGC'],iac,2)
-# set the rest to integer
-varList = ['NGCS', 'ECS', 'DCS', 'ACS', 'COST', 'IC']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    import num2words
+    from docx import Document
+    from python_docx_replace import docx_blocks
+    iac = deepcopy(results)
+    ## Format strings
+    # Convert to word
+    iac.FANStr = num2words.num2words(iac.FAN)
+    # set electricity cost / rebate to 3 digits accuracy
+    iac = dollar(['EC'],iac,3)
+    # set demand to 2 digits accuracy
+    iac = dollar(['DC', 'NGC'],iac,2)
+    # set the rest to integer
+    varList = ['NGCS', 'ECS', 'DCS', 'ACS', 'COST', 'IC']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
 
-# Import docx template
-doc = Document('template.docx')
+    # Import docx template
+    doc = Document(os.path.join(FOLDER, 'template.docx'))
 
-# rebate block
-docx_blocks(doc, REBATE=iac.REB)
+    # rebate block
+    docx_blocks(doc, REBATE=iac.REB)
 
-# Replacing keys
-docx_replace(doc, **iac)
+    # Replacing keys
+    replace_tags(doc, iac)
+    return doc
 
-savefile(doc, iac.REC)
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC))
 
-# Caveats
-caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
+    # Caveats
+    caveat("Please change implementation cost references if necessary.")
\ No newline at end of file
@@ -2,118 +2,159 @@
 This script is used to generate the IAC recommendation for Install Solar Panels.
 """
 
-import json5, sys, os, locale
-from docx import Document
-from easydict import EasyDict
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from python_docx_replace import docx_replace
-sys.path.append(os.path.join('..', '..')) 
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 from Shared.IAC import *
-import requests, datetime
+from copy import deepcopy
+import datetime
 
-# Load utility cost
-jsonDict = json5.load(open(os.path.join('..', '..', 'Utility.json5')))
-# Load database
-jsonDict.update(json5.load(open('database.json5')))
-# Convert to easydict
-iac = EasyDict(jsonDict)
+# Template folder
+FOLDER = os.path.dirname(os.path.abspath(__file__))
 
-# Different template for PA/NJ
-if iac.ST == "PA":
-    template = "template - PA.docx"
-    iac.AMV = iac.AMVPA
-elif iac.ST == "NJ":
-    template = "template - NJ.docx"
-    iac.AMV = iac.AMVNJ
-else:
-    pass
+def calculate(inputs: dict) -> dict:
+    """
+    Calculate savings without touching Word
+    :param inputs: EasyDict of utility cost and database
+    :return: EasyDict of inputs and results
+    """
+    from Shared.PVWatts import pvwatts, scale
+    iac = deepcopy(inputs)
+    # Different market value for PA/NJ
+    if iac.ST == "PA":
+        iac.AMV = iac.AMVPA
+    elif iac.ST == "NJ":
+        iac.AMV = iac.AMVNJ
+    else:
+        pass
 
-# Calculations
-# Avaialble space ft2
-iac.AS = round(iac.RS * iac.ASR / 100)
-# Capacity kW
-iac.CAP = round(iac.AS / 100)
-# Approx. energy savings, kWh
-iac.AES = iac.CAP * 1200
+    # Calculations
+    # Avaialble space ft2
+    iac.AS = round(iac.RS * iac.ASR / 100)
+    # Capacity kW
+    iac.CAP = round(iac.AS / 100)
+    # PVWatts API, output of 1 kW of the reference array, cached per site
+    PV = pvwatts(iac.ZIP, 1, iac.api, iac.YIELD, tilt=iac.TILT, azimuth=iac.AZ)
+    # Output of the array relative to the reference array
+    iac.PVF = 1
+    # Best capacity and orientation within the roof area
+    if iac.SWEEP and iac.CAP > 0:
+        iac = sweep(iac, PV['ac_annual'])
 
-# PVWatts API
-parameters = {
-'format': 'json',
-'api_key': iac.api,
-'system_capacity': iac.CAP,
-'module_type': 0,
-'losses': 14.08,
-'array_type': 0,
-'tilt': 20,
-'azimuth': 180,
-'address': iac.ZIP,
-}
+    PV = scale(PV, iac.CAP * iac.PVF)
+    iac.ES = round(PV['ac_annual'])
 
-solard_monthly = [2.49, 3.42, 4.24, 5.07, 5.73, 5.89, 6.30, 5.60, 4.72, 3.64, 2.96, 1.98]
-ac_monthly = [10762, 13137, 17398, 19346, 21770, 21224,23189, 20814, 17107, 14396, 11782,8576]
-try:
-  response = requests.request('GET', 'https://developer.nrel.gov/api/pvwatts/v8.json', params=parameters)
-  response.raise_for_status()
-  PVresults = response.json()
-  iac.ES = round(PVresults.get('outputs').get('ac_annual'))
-  # read solard_monthly and ac_monthly
-  solard_monthly = PVresults.get('outputs').get('solrad_monthly')
-  ac_monthly = PVresults.get('outputs').get('ac_monthly')
-except:
-  print(response.status_code)
-  print('PVWatts API error. Please look up the annual energy savings manually on PVWatts website')
-  # input number
-  iac.ES = int(input('Manually input annual energy savings (kWh): '))
+    iac.ACSel = round(iac.ES * iac.EC)
+    iac.credits = round(iac.ES / 1000)
+    iac.ACSsr = round(iac.AMV * iac.credits)
+    iac.ACS = iac.ACSel + iac.ACSsr
 
-iac.ACSel = round(iac.ES * iac.EC)
-iac.credits = round(iac.ES / 1000)
-iac.ACSsr = round(iac.AMV * iac.credits)
-iac.ACS = iac.ACSel + iac.ACSsr
+    # Implementation cost
+    iac.IC = round(iac.CAP * iac.PPW * 1000)
+    iac.ITC = round(iac.IC * iac.ITCR / 100)
+    iac.MIC = iac.IC - iac.ITC
+    iac.PB = payback(iac.ACS, iac.MIC)
+    iac.CM = datetime.datetime.now().strftime('%B %Y')
+    # Monthly solar radiation and AC output, not formatted as strings
+    iac.SOLRAD = PV['solrad_monthly']
+    iac.ACMONTHLY = PV['ac_monthly']
+    return iac
 
-# Implementation cost
-iac.IC = round(iac.CAP * iac.PPW * 1000)
-iac.ITC = round(iac.IC * iac.ITCR / 100)
-iac.MIC = iac.IC - iac.ITC
-iac.PB = payback(iac.ACS, iac.MIC)
-iac.CM = datetime.datetime.now().strftime('%B %Y')
+def sweep(inputs: dict, perkW: float) -> dict:
+    """
+    Sweep capacity, tilt and azimuth, keep the system with the best NPV or payback
+    :param inputs: EasyDict with the largest capacity CAP, reference TILT and AZ
+    :param perkW: Annual output of 1 kW of the reference array, kWh
+    :return: EasyDict with CAP, TILT, AZ, PVF (output relative to the reference array) and NPV of the best system
+    """
+    import numpy as np
+    from Shared.PVWatts import orientation_factors
+    from Shared.Weather import locate
+    iac = deepcopy(inputs)
+    # Grid, capacity is limited by the roof area
+    caps = np.unique(np.round(np.linspace(0, iac.CAP, 21)[1:]))
+    caps = caps[caps > 0]
+    tilts = np.arange(0, 45, 5)
+    azimuths = np.arange(90, 285, 15)
+    # Annual production of every point, scaled from the PVWatts run of the reference array
+    factors = orientation_factors(locate(iac.ZIP)[0], tilts, azimuths, iac.TILT, iac.AZ)
+    ES = perkW * factors[:, :, None] * caps
+    # Electricity savings are limited to the plant usage, SRECs are earned on all production
+    ACS = np.minimum(ES, iac.TotalEkWh) * iac.EC + ES / 1000 * iac.AMV
+    MIC = caps * iac.PPW * 1000 * (1 - iac.ITCR / 100)
+    PB = MIC / ACS
+    # Present value of the annual savings over the system life
+    rate = iac.DR / 100
+    annuity = (1 - (1 + rate) ** -iac.LIFE) / rate if rate > 0 else iac.LIFE
+    NPV = ACS * annuity - MIC
+    if iac.GOAL == "NPV":
+        best = np.argmax(NPV)
+    elif iac.GOAL == "PB":
+        # Payback is the same for many capacities, take the best NPV among them
+        best = np.argmax(np.where(PB <= PB.min() * (1 + 1e-9), NPV, -np.inf))
+    else:
+        raise Exception('GOAL must be "NPV" or "PB".')
+    t, a, c = np.unravel_index(best, NPV.shape)
+    iac.TILT = int(tilts[t])
+    iac.AZ = int(azimuths[a])
+    iac.CAP = int(caps[c])
+    iac.PVF = factors[t, a].item()
+    iac.NPV = round(NPV[t, a, c].item())
+    if iac.NPV < 0:
+        caveat("No system has a positive NPV over " + str(iac.LIFE) + " years at " + str(iac.DR) +
+               "% discount rate, the smallest loss is shown.")
+    return iac
 
-## Format strings
-# set electricity cost / rebate to 3 digits accuracy
-iac = dollar(['EC'],iac,3)
-# set the natural gas and demand to 2 digits accuracy
-iac = dollar(['NGC', 'DC', 'PPW'],iac,2)
-# set the rest to integer
-varList = ['LR', 'MIC', 'IC', 'ITC', 'AMV', 'ACSel', 'ACSsr', 'ACS']
-iac = dollar(varList,iac,0)
-# Format all numbers to string with thousand separator
-iac = grouping_num(iac)
+def render(results: dict):
+    """
+    Format the results and fill the template
+    :param results: EasyDict returned by calculate
+    :return: Document
+    """
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    iac = deepcopy(results)
+    # Monthly solar radiation and AC output
+    solard_monthly = iac.pop('SOLRAD')
+    ac_monthly = iac.pop('ACMONTHLY')
+    ## Format strings
+    # set electricity cost / rebate to 3 digits accuracy
+    iac = dollar(['EC'],iac,3)
+    # set the natural gas and demand to 2 digits accuracy
+    iac = dollar(['NGC', 'DC', 'PPW'],iac,2)
+    # set the rest to integer
+    varList = ['LR', 'MIC', 'IC', 'ITC', 'AMV', 'ACSel', 'ACSsr', 'ACS']
+    iac = dollar(varList,iac,0)
+    # Format all numbers to string with thousand separator
+    iac = grouping_num(iac)
 
-doc = Document(template)
+    # Different template for PA/NJ
+    doc = Document(os.path.join(FOLDER, "template - " + iac.ST + ".docx"))
 
-# Replacing keys
-docx_replace(doc, **iac)
+    # Replacing keys
+    replace_tags(doc, iac)
 
-# Set locale to US
-try:
-    locale.setlocale(locale.LC_ALL, "en_US")
-except: # Linux?
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
-    
-# Fill in the second table
-table = doc.tables[1]
-for i in range(12):
-    table.cell(i+1, 1).text = str(round(solard_monthly[i],2))
-    table.cell(i+1, 1).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    table.cell(i+1, 2).text = locale.format_string('%d',round(ac_monthly[i]), grouping=True)
-    table.cell(i+1, 2).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-table.cell(13, 1).text = str(round(sum(solard_monthly)/12,2))
-table.cell(13, 1).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-table.cell(13, 1).paragraphs[0].runs[0].bold = True
-table.cell(13, 2).text = locale.format_string('%d',round(sum(ac_monthly)), grouping=True)
-table.cell(13, 2).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
-table.cell(13, 2).paragraphs[0].runs[0].bold = True
+    # Fill in the second table
+    table = doc.tables[1]
+    for i in range(12):
+        table.cell(i+1, 1).text = str(round(solard_monthly[i],2))
+        table.cell(i+1, 1).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+        table.cell(i+1, 2).text = format_int(round(ac_monthly[i]))
+        table.cell(i+1, 2).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    table.cell(13, 1).text = str(round(sum(solard_monthly)/12,2))
+    table.cell(13, 1).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    table.cell(13, 1).paragraphs[0].runs[0].bold = True
+    table.cell(13, 2).text = format_int(round(sum(ac_monthly)))
+    table.cell(13, 2).paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    table.cell(13, 2).paragraphs[0].runs[0].bold = True
+    return doc
 
-savefile(doc, iac.REC, add=True)
+if __name__ == '__main__':
+    iac = calculate(load_database(os.path.join(FOLDER, 'database.json5')))
+    savefile(render(iac), str(iac.REC), add=True)
 
-# Caveats
-caveat("Please check if the grabbed info is correct.")
\ No newline at end of file
+    # Caveats
+    caveat("Please check if the grabbed info is correct.")
+    if iac.TILT != 20 or iac.AZ != 180:
+        caveat("The template describes a 20-degree south facing array, please update it to " +
+               str(iac.TILT) + " degrees tilt and " + str(iac.AZ) + " degrees azimuth. " +
+               "The monthly table is scaled from the 20-degree south facing array.")
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+(Purpose) Bills.py computes the utility bill analysis of Energy Charts.xlsx in Python
+The monthly bills and the fuel conversion table of the Raw Data sheet are the only inputs, so Utility.json5 can be
+regenerated without Excel recalculating the workbook. The formulas follow the Raw Data and Total Energy sheets.
+"""
+
+# Electricity MMBtu per kWh, column I of the Raw Data sheet
+KWH_MMBTU = 0.003412 / 0.33
+# Columns of the monthly bills
+# kWh: electricity usage, EUsageCost: usage charge $, kW: peak demand, EDemandCost: demand charge $,
+# ETotalCost: total electricity charge $, FuelUsage: fuel usage in FuelUnit, FuelCost: fuel cost $
+COLUMNS = ['kWh', 'EUsageCost', 'kW', 'EDemandCost', 'ETotalCost', 'FuelUsage', 'FuelCost']
+
+def fuel_factor(factors: dict, FuelType: str, FuelUnit: str) -> float:
+    """
+    MMBtu per unit of fuel
+    :param factors: Conversion table of the Raw Data sheet, e.g. factors['Natural Gas']['Mcf']
+    :param FuelType: e.g. "Natural Gas"
+    :param FuelUnit: e.g. "Mcf"
+    :return: float
+    """
+    if FuelUnit not in factors.get(FuelType, {}):
+        raise Exception("No conversion factor for " + str(FuelType) + " in " + str(FuelUnit) + ".")
+    return factors[FuelType][FuelUnit]
+
+def rate(cost: float, usage: float):
+    """
+    Blended rate, None without usage
+    :param cost: Total cost $
+    :param usage: Total usage
+    :return: float or None
+    """
+    return float(cost / usage) if usage != 0 else None
+
+def analyze_bills(bills, FuelType: str, FuelUnit: str, start, factors: dict) -> dict:
+    """
+    Compute rates, totals and monthly tables from monthly bills
+    :param bills: pandas DataFrame with COLUMNS, one row per month in order
+    :param FuelType: e.g. "Natural Gas"
+    :param FuelUnit: e.g. "Mcf"
+    :param start: First billing month as datetime
+    :param factors: Fuel conversion table of the Raw Data sheet, MMBtu per unit, e.g. factors['Natural Gas']['Mcf']
+    :return: EasyDict of the utility model, see Shared/UtilityData.py
+    """
+    import pandas as pd
+    from easydict import EasyDict
+    missing = [column for column in COLUMNS if column not in bills]
+    if missing:
+        raise Exception("Bills are missing columns: " + ", ".join(missing))
+    if len(bills) < 12:
+        raise Exception("At least 12 months of bills are needed, got " + str(len(bills)) + ".")
+    bills = bills[COLUMNS].astype(float).reset_index(drop=True)
+    if bills.isna().any().any():
+        raise Exception("Bills have empty values.")
+    # Month labels, e.g. "Jul 22"
+    months = [month.strftime('%b %y') for month in pd.date_range(start, periods=len(bills), freq='MS')]
+
+    # Electricity table
+    electricity = pd.DataFrame({
+        'kWh': bills.kWh,
+        'EUsageCost': bills.EUsageCost,
+        'kW': bills.kW,
+        'EDemandCost': bills.EDemandCost,
+        # Other fees are what's left of the total charge
+        'Fees': bills.ETotalCost - bills.EUsageCost - bills.EDemandCost,
+        'ETotalCost': bills.ETotalCost,
+        'MMBtu': bills.kWh * KWH_MMBTU
+    })
+    # Fuel table
+    fuel = pd.DataFrame({
+        'FuelUsage': bills.FuelUsage,
+        'MMBtu': bills.FuelUsage * fuel_factor(factors, FuelType, FuelUnit),
+        'FuelCost': bills.FuelCost
+    })
+    eTotal = electricity.sum()
+    fTotal = fuel.sum()
+
+    model = EasyDict()
+    # Blended rates, None without usage
+    model.EC = rate(eTotal.EUsageCost, eTotal.kWh)
+    model.DC = rate(eTotal.EDemandCost, eTotal.kW)
+    model.FC = rate(fTotal.FuelCost, fTotal.MMBtu)
+    model.Fees = eTotal.Fees.item()
+    model.FuelType = FuelType
+    model.FuelUnit = FuelUnit
+    model.StartMo = months[0]
+    model.EndMo = months[-1]
+    # Totals
+    model.TotalEkWh = eTotal.kWh.item()
+    model.TotalEBtu = eTotal.MMBtu.item()
+    model.TotalDkW = eTotal.kW.item()
+    model.TotalFBtu = fTotal.MMBtu.item()
+    model.EUsageCost = eTotal.EUsageCost.item()
+    model.EDemandCost = eTotal.EDemandCost.item()
+    model.FuelCost = fTotal.FuelCost.item()
+    model.TotalBtu = model.TotalEBtu + model.TotalFBtu
+    model.TotalCost = model.EUsageCost + model.EDemandCost + model.FuelCost
+    # Monthly tables with the total as the last row
+    model.Electricity = [[month] + row for month, row in zip(months + ['Total'], electricity.values.tolist() + [eTotal.tolist()])]
+    model.Fuel = [[month] + row for month, row in zip(months + ['Total'], fuel.values.tolist() + [fTotal.tolist()])]
+    return model
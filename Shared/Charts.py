@@ -0,0 +1,159 @@
+"""
+(Purpose) Charts.py renders the energy charts of the energy bill analysis from the utility model
+The charts follow Energy Charts.xlsx and are rendered headlessly with the Agg backend of matplotlib,
+so the workbook doesn't need to be exported as a web page. Images are cached in .cache/charts/ by data hash.
+"""
+
+import os
+
+# Bump when the charts change
+VERSION = 1
+
+# Theme colors of Energy Charts.xlsx
+ELECTRICITY = '#4BACC6'
+DEMAND = '#8064A2'
+FUEL = '#F79646'
+
+# Chart tags of Energy.docx and their width in inches
+TAGS = {
+    '#EUChart': 6,
+    '#ECChart': 6,
+    '#DUChart': 6,
+    '#DCChart': 6,
+    '#FUChart': 6,
+    '#FCChart': 6,
+    '#PieUChart': 6,
+    '#PieCChart': 6,
+    '#TotalChart': 9
+}
+# Image height in inches, the image is scaled to the width in the report
+HEIGHT = 3.6
+DPI = 200
+
+def monthly_series(model: dict) -> dict:
+    """
+    Monthly series of the charts, without the total row
+    :param model: Utility model, see Shared/UtilityData.py
+    :return: Dictionary of series name to list
+    """
+    electricity = model.Electricity[:-1]
+    fuel = model.Fuel[:-1]
+    return {
+        'Month': [row[0] for row in electricity],
+        'kWh': [row[1] for row in electricity],
+        'EUsageCost': [row[2] for row in electricity],
+        'kW': [row[3] for row in electricity],
+        'EDemandCost': [row[4] for row in electricity],
+        'FuelBtu': [row[2] for row in fuel],
+        'FuelCost': [row[3] for row in fuel]
+    }
+
+def bar_chart(ax, months: list, series: list, title: str, ylabel: str):
+    """
+    Draw a clustered column chart with value labels
+    :param ax: matplotlib Axes
+    :param months: List of month labels
+    :param series: List of (name, values, color)
+    :param title: Chart title
+    :param ylabel: Y axis title
+    """
+    import numpy as np
+    x = np.arange(len(months))
+    width = 0.8 / len(series) if len(series) > 1 else 0.5
+    for i, (name, values, color) in enumerate(series):
+        bars = ax.bar(x + (i - (len(series) - 1) / 2) * width, values, width, label=name, color=color)
+        # Value labels are too crowded on clustered charts
+        if len(series) == 1:
+            ax.bar_label(bars, labels=['{:,.0f}'.format(value) for value in values], fontsize=6, padding=2, rotation=90)
+    ax.set_title(title, fontsize=11, fontweight='bold')
+    ax.set_xlabel('Billing Month', fontsize=9)
+    ax.set_ylabel(ylabel, fontsize=9)
+    ax.set_xticks(x, months, fontsize=8, rotation=45)
+    ax.tick_params(axis='y', labelsize=8)
+    ax.yaxis.set_major_formatter('{x:,.0f}')
+    ax.grid(axis='y', color='#D9D9D9', linewidth=0.6)
+    ax.set_axisbelow(True)
+    ax.margins(y=0.25)
+    for side in ['top', 'right']:
+        ax.spines[side].set_visible(False)
+    if len(series) > 1:
+        ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.3), ncol=len(series), frameon=False, fontsize=8)
+
+def pie_chart(ax, series: list, title: str):
+    """
+    Draw a pie chart with percentage labels
+    :param ax: matplotlib Axes
+    :param series: List of (name, value, color)
+    :param title: Chart title
+    """
+    names, values, colors = zip(*series)
+    ax.pie(values, colors=colors, autopct='%1.0f%%', startangle=90, counterclock=False,
+           wedgeprops={'edgecolor': 'white'}, textprops={'color': 'white', 'fontsize': 10, 'fontweight': 'bold'})
+    ax.set_title(title, fontsize=11, fontweight='bold')
+    ax.legend(names, loc='center left', bbox_to_anchor=(1, 0.5), frameon=False, fontsize=9)
+    ax.axis('equal')
+
+def draw_charts(model: dict) -> dict:
+    """
+    Draw every chart of the energy bill analysis
+    :param model: Utility model, see Shared/UtilityData.py
+    :return: Dictionary of chart tag to function drawing it on an Axes
+    """
+    data = monthly_series(model)
+    months = data['Month']
+    fuel = model.FuelType
+    return {
+        '#EUChart': lambda ax: bar_chart(ax, months, [('Electricity', data['kWh'], ELECTRICITY)],
+                                         'Electricity Usage vs. Billing Month', 'Electricity Usage [kWh]'),
+        '#ECChart': lambda ax: bar_chart(ax, months, [('Electricity', data['EUsageCost'], ELECTRICITY)],
+                                         'Electricity Cost vs. Billing Month', 'Electricity Cost [$]'),
+        '#DUChart': lambda ax: bar_chart(ax, months, [('Demand', data['kW'], DEMAND)],
+                                         'Peak Demand vs. Billing Month', 'Peak Demand [kW]'),
+        '#DCChart': lambda ax: bar_chart(ax, months, [('Demand', data['EDemandCost'], DEMAND)],
+                                         'Demand Cost vs. Billing Month', 'Demand Cost [$]'),
+        '#FUChart': lambda ax: bar_chart(ax, months, [(fuel, data['FuelBtu'], FUEL)],
+                                         fuel + ' Usage vs. Billing Month', fuel + ' Usage [MMBtu]'),
+        '#FCChart': lambda ax: bar_chart(ax, months, [(fuel, data['FuelCost'], FUEL)],
+                                         fuel + ' Cost vs. Billing Month', fuel + ' Cost [$]'),
+        # Same totals as the Total Energy sheet
+        '#PieUChart': lambda ax: pie_chart(ax, [('Electricity', model.TotalEBtu, ELECTRICITY),
+                                                (fuel, model.TotalFBtu, FUEL)], 'Energy Usage Pie Chart'),
+        '#PieCChart': lambda ax: pie_chart(ax, [('Electricity', model.EUsageCost, ELECTRICITY),
+                                                ('Demand', model.EDemandCost, DEMAND),
+                                                (fuel, model.FuelCost, FUEL)], 'Energy Cost Pie Chart'),
+        '#TotalChart': lambda ax: bar_chart(ax, months, [('Electricity', data['EUsageCost'], ELECTRICITY),
+                                                         ('Demand', data['EDemandCost'], DEMAND),
+                                                         (fuel, data['FuelCost'], FUEL)],
+                                            'Total Energy Cost vs. Billing Month', 'Energy Cost [$]')
+    }
+
+def render_charts(model: dict) -> dict:
+    """
+    Render the energy charts to PNG, reusing the images of the same data
+    :param model: Utility model, see Shared/UtilityData.py
+    :return: Dictionary of chart tag to (image path, width) for add_images()
+    """
+    from Shared.IAC import cache_path, build_key
+    from docx import shared
+    key = build_key([VERSION, model.FuelType, model.Electricity, model.Fuel])
+    folder = cache_path(os.path.join('charts', key[:16]))
+    images = {tag: (os.path.join(folder, tag[1:] + '.png'), shared.Inches(width)) for tag, width in TAGS.items()}
+    if all(os.path.isfile(path) for path, width in images.values()):
+        return images
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    os.makedirs(folder, exist_ok=True)
+    for tag, draw in draw_charts(model).items():
+        fig, ax = plt.subplots(figsize=(TAGS[tag], HEIGHT))
+        try:
+            draw(ax)
+            fig.tight_layout()
+            # Write to a temporary file first, an interrupted run leaves no broken image
+            path = images[tag][0]
+            fig.savefig(path + '.tmp', format='png', dpi=DPI)
+            os.replace(path + '.tmp', path)
+        finally:
+            plt.close(fig)
+    return images
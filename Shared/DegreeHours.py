@@ -0,0 +1,53 @@
+"""
+(Purpose) DegreeHours.py computes degree hours from an hourly temperature profile and weekly schedules
+Every array covers the 8760 hours of a year from midnight on January 1st, see Shared.Weather.hourly_temperature.
+Several schedules or set temperatures can be stacked along the first axis and computed in one pass.
+"""
+
+from Shared.Weather import YEAR
+
+# Hours per year, February 29th is skipped
+HOURS = 8760
+
+def weekly_schedule(hours: float, weeks: float=52, days: int=5, start: float=8, year: int=YEAR):
+    """
+    Fraction of every hour of the year covered by a weekly schedule
+    :param hours: Hours per week, float (allows half hours)
+    :param weeks(optional): Weeks per year, spread evenly over the year
+    :param days(optional): Days per week from Monday, more days are used if the hours don't fit
+    :param start(optional): Hour of the day the schedule starts, moved earlier if the hours don't fit
+    :param year(optional): Year, for the weekday of January 1st
+    :return: numpy array of 8760 fractions between 0 and 1
+    """
+    import math
+    import numpy as np
+    from datetime import datetime
+    if hours < 0 or hours > 168:
+        raise Exception("Hours per week must be between 0 and 168.")
+    days = min(max(days, math.ceil(hours / 24)), 7)
+    daily = hours / days
+    start = min(start, 24 - daily)
+    # Overlap of every hour of the day with [start, start + daily]
+    slot = np.arange(24)
+    day = np.clip(start + daily - slot, 0, 1) - np.clip(start - slot, 0, 1)
+    week = np.concatenate([day] * days + [np.zeros(24)] * (7 - days))
+    # Shift the week so that hour 0 falls on the weekday of January 1st
+    index = (np.arange(HOURS) + datetime(year, 1, 1).weekday() * 24) % 168
+    return week[index] * min(weeks, 52) / 52
+
+def degree_hours(temps, setpoints, weights=1) -> tuple:
+    """
+    Cooling and heating degree hours of one or several schedules
+    :param temps: numpy array of 8760 outdoor temperatures, degF
+    :param setpoints: Set temperature, degF, scalar or array of shape (N, 1) or (N, 8760)
+    :param weights(optional): Fraction of every hour counted, scalar or array of shape (N, 8760)
+    :return: (cooling, heating) degree hours per year, floats or numpy arrays of N
+    """
+    import numpy as np
+    difference = np.asarray(temps, dtype=float) - np.asarray(setpoints, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    cooling = (np.maximum(difference, 0) * weights).sum(axis=-1)
+    heating = (np.maximum(-difference, 0) * weights).sum(axis=-1)
+    if cooling.ndim == 0:
+        return cooling.item(), heating.item()
+    return cooling, heating
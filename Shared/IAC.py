@@ -30,6 +30,21 @@ def rebate(dic: dict) -> dict:
     dic.PB = payback(dic.ACS, dic.IC)
     return dic
 
+# Overwrite existing recommendation documents without asking, set by batch mode
+OVERWRITE = False
+
+def rec_filename(rec: str, add=False) -> str:
+    """
+    Filename of a recommendation document
+    :param rec: Recommendation No., string
+    :param add(optional): additional flag, bool
+    :return: Filename as string
+    """
+    if add:
+        return 'Add'+ rec +'.docx'
+    else:
+        return 'Rec'+ rec +'.docx'
+
 def savefile(doc, rec: str, add=False):
     """
     Avoid overwriting recommendation documents directly
@@ -38,12 +53,10 @@ def savefile(doc, rec: str, add=False):
     :param add(optional): additional flag, bool
     """
     import os
-    if add:
-        filename = 'Add'+ rec +'.docx'
-    else:
-        filename = 'Rec'+ rec +'.docx'
-    filepath = os.path.join('..', '..', 'Recommendations', filename)
-    while os.path.isfile(filepath):
+    filename = rec_filename(rec, add)
+    recPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Recommendations')
+    filepath = os.path.join(recPath, filename)
+    while os.path.isfile(filepath) and not OVERWRITE:
         answer = input("Filename exists, overwrite or rename?(o/r)")
         if answer.lower() == "o":
             break
@@ -54,13 +67,99 @@ def savefile(doc, rec: str, add=False):
                     None
                 else:
                     filename = filename + ".docx"
-                filepath = os.path.join('..', '..', 'Recommendations', filename)
+                filepath = os.path.join(recPath, filename)
             break
         else: 
             print("Command not recongnized.")
     doc.save(filepath)
     print("File saved to " + os.path.abspath(filepath))
-                
+
+# Parsed Utility.json5 and its modification time
+_utility = None
+
+def load_database(path: str='database.json5') -> dict:
+    """
+    Load utility cost and the template database.
+    Utility.json5 is parsed once per process and shared by every template
+    :param path(optional): Path to the template database, default is database.json5
+    :return: EasyDict
+    """
+    import os, json5
+    from copy import deepcopy
+    from easydict import EasyDict
+    global _utility
+    utilityPath = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Utility.json5')
+    mtime = os.path.getmtime(utilityPath)
+    if _utility is None or _utility[0] != mtime:
+        with open(utilityPath) as f:
+            _utility = (mtime, json5.load(f))
+    # Templates modify the dictionary, so start from a copy
+    jsonDict = deepcopy(_utility[1])
+    with open(path) as f:
+        jsonDict.update(json5.load(f))
+    return EasyDict(jsonDict)
+
+def update_json5(path: str, values: dict) -> bool:
+    """
+    Replace the values of top level keys in a json5 file, keeping comments and formatting.
+    The file is scanned once and replaced atomically, and not written at all if nothing changed
+    :param path: Path to the json5 file
+    :param values: Dictionary of keys and new values, strings are written with double quotes
+    :return: True if the file was written
+    """
+    import os, re, json, tempfile
+    with open(path, 'r') as f:
+        original = f.read()
+    lines = original.split('\n')
+    # A top level "KEY: value," line, the value is a quoted string or a single token
+    pattern = re.compile(r'''^(\s*(["']?)(\w+)\2\s*:\s*)("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^\s,/]+)''')
+    found = set()
+    depth = 0
+    block = False
+    for n, line in enumerate(lines):
+        match = pattern.match(line) if depth == 1 and not block else None
+        if match and match.group(3) in values:
+            key = match.group(3)
+            found.add(key)
+            line = match.group(1) + json.dumps(values[key], ensure_ascii=False) + line[match.end():]
+            lines[n] = line
+        # Track the nesting depth outside strings and comments
+        i, quote = 0, None
+        while i < len(line):
+            c = line[i]
+            if block:
+                if line.startswith('*/', i):
+                    block = False
+                    i += 1
+            elif quote:
+                if c == '\\':
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c in '"\'':
+                quote = c
+            elif line.startswith('//', i):
+                break
+            elif line.startswith('/*', i):
+                block = True
+                i += 1
+            elif c in '{[':
+                depth += 1
+            elif c in '}]':
+                depth -= 1
+            i += 1
+    missing = [key for key in values if key not in found]
+    if missing:
+        raise Exception("Keys not found in " + path + ": " + ", ".join(missing))
+    text = '\n'.join(lines)
+    if text == original:
+        return False
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
 def title_case(text: str) -> str:
     """
     Make title case in natural language
@@ -82,47 +181,205 @@ def title_case(text: str) -> str:
             text[i] = word.title()
     return ' '.join(text)
 
+# ARC code to description, loaded on first use
+_arc_index = None
+
+# Application codes
+APPLICATIONS = {
+    '1': 'Manufacturing Process',
+    '2': 'Process Support',
+    '3': 'Building and Grounds',
+    '4': 'Administrative'
+}
+
+def arc_index() -> dict:
+    """
+    Load ARC.json once per process
+    :return: Dictionary of ARC code to description
+    """
+    # json5 is too slow, use json instead.
+    import os, json
+    global _arc_index
+    if _arc_index is None:
+        arc_path = os.path.dirname(os.path.abspath(__file__))
+        with open(os.path.join(arc_path, 'ARC.json')) as f:
+            _arc_index = json.load(f)
+    return _arc_index
+
+def validate_arcs(ARCs: list) -> list:
+    """
+    Validate a list of ARC numbers without printing or raising
+    :param ARCs: List of full ARCs as strings
+    :return: List of dictionaries with ARC, code, description, application and error (None if valid)
+    """
+    index = arc_index()
+    results = []
+    for ARC in ARCs:
+        result = {'ARC': ARC, 'code': None, 'description': None, 'application': None, 'error': None}
+        results.append(result)
+        # Validate if ARC is in x.xxxx.xxx format
+        ARCsplit = str(ARC).split('.')
+        if len(ARCsplit) != 3 or not all(part.isdigit() for part in ARCsplit):
+            result['error'] = "ARC number must be in x.xxx(x).x format"
+            continue
+        # Parse ARC code
+        result['code'] = ARCsplit[0] + '.' + ARCsplit[1]
+        if result['code'] not in index:
+            result['error'] = "ARC not found."
+            continue
+        result['description'] = index[result['code']]
+        # Parse application code
+        if ARCsplit[2] not in APPLICATIONS:
+            result['error'] = "Application code not found."
+            continue
+        result['application'] = ARCsplit[2]
+    return results
+
+def print_arc(result: dict):
+    """
+    Print a validated ARC number
+    :param result: Dictionary returned by validate_arcs
+    """
+    print(result['code'] + ": " + result['description'])
+    print("Application code " + result['application'] + ": " + APPLICATIONS[result['application']])
+    print("")
+
 def validate_arc(ARC):
     """
     Validate ARC number
     :param ARC: Full ARC as a string
     """
-    # json5 is too slow, use json instead.
-    import os, json
-    # Validate if ARC is in x.xxxx.xxx format
-    ARCsplit = ARC.split('.')
-    if len(ARCsplit) != 3:
-        raise Exception("ARC number must be in x.xxx(x).x format")
-    # if ARC split are nut full numbers
-    for i in range(len(ARCsplit)):
-        if ARCsplit[i].isdigit() == False:
-            raise Exception("ARC number must be in x.xxx(x).x format")
-    
-    # Parse ARC code
-    code = ARCsplit[0] + '.' + ARCsplit[1]
-    # Read ARC.json as dictionary
-    arc_path = os.path.dirname(os.path.abspath(__file__))
-    ARCdict = json.load(open(os.path.join(arc_path, 'ARC.json')))
+    result = validate_arcs([ARC])[0]
+    if result['error'] is not None:
+        raise Exception(result['error'])
+    print_arc(result)
+
+def parse_rec(doc, filename: str) -> dict:
+    """
+    Extract title and summary table information from a recommendation document
+    :param doc: Document
+    :param filename: File name of the recommendation, string
+    :return: Dictionary of recommendation information, one row of the compiler dataframe
+    """
+    # Parse numbers without the process locale
+    def atoi(text: str) -> int:
+        return int(text.replace(',', ''))
+
+    recInfo = {}
+    # Record file name
+    recInfo['File Name'] = filename
+
+    # Parse document title
+    fullTitle = doc.paragraphs[0].text
+    separatorFlag = False
+    # list of possible separators
+    separatorList = [":", "-", "–"]
+    for separator in separatorList:
+        if separator in fullTitle:
+            separatorFlag = True
+            # check if the document is an additional recommendation by title
+            # Keep "AAR" for outdated documents
+            recInfo['isAdditional'] = ("Additional" in fullTitle.split(separator)[0]) or ("AAR" in fullTitle.split(separator)[0])
+            # Parse the title of the .docx file
+            recInfo['Description'] = title_case(fullTitle.split(separator)[1].strip())
+            break
+    if separatorFlag == False:
+        raise Exception("Can't parse document title:\n" + fullTitle)
+
+    # Read the 1st table in .docx files
     try:
-        desc = ARCdict[code]
-        print(code + ": "+ desc)
+        table = doc.tables[0]
     except:
-        raise Exception("ARC not found.") 
-
-    # Parse application code
-    app = ARCsplit[2]
-    if app == '1':
-        print("Application code 1: Manufacturing Process")
-    elif app == '2':
-        print("Application code 2: Process Support")
-    elif app == '3':
-        print("Application code 3: Building and Grounds")
-    elif app == '4':
-        print("Application code 4: Administrative")
-    else:
-        raise Exception("Application code not found.")
+        raise Exception("Error: " + filename + " is not a valid recommendation. Please check if the summary table is present.")
 
-    print("")
+    for row in table.rows:
+        key = row.cells[0].text
+        value = row.cells[1].text
+        # Parse ARC Number, validated later by the caller
+        if "arc" in key.lower() and "number" in key.lower():
+            recInfo['ARC No.'] = value
+        # Parse Annual Cost Savings
+        elif "annual" in key.lower() and "cost" in key.lower():
+            # convert currency to interger
+            recInfo['Annual Cost Savings'] = atoi(value.strip("$"))
+        # Parse Implementation Cost
+        elif "implementation" in key.lower():
+            # convert currency to interger
+            recInfo['Implementation Cost'] = atoi(value.strip("$"))
+        # If Payback Period skip (Doesn't matter, will calculate later)
+        elif "payback" in key.lower():
+            continue
+        # Parse Electricity
+        elif "electricity" in key.lower():
+            recInfo['Electricity (kWh)'] = atoi(value.split(' ')[0])
+        # Parse Demand
+        elif "demand" in key.lower():
+            recInfo['Demand (kW)'] = atoi(value.split(' ')[0])
+        # Parse Natural Gas
+        elif "natural" in key.lower():
+            recInfo['Natural Gas (MMBtu)'] = atoi(value.split(' ')[0])
+        # Parse undefined type
+        else:
+            # Remove "annual" (usually the first word)
+            if "annual" in key.lower():
+                key = key.split(' ', 1)[1]
+            # Remove "savings" (usually the last word)
+            if "saving" in key.lower():
+                key = key.rsplit(' ', 1)[0]
+            # If the value contains mmbtu, parse it as other energy
+            if "mmbtu" in value.lower():
+                recInfo['Other Energy Type'] = title_case(key)
+                # Parse number
+                recInfo['Other Energy Amount'] = atoi(value.split(' ')[0])
+            # If not, parse it as other resource
+            else:
+                recInfo['Other Resource Type'] = title_case(key)
+                # Keep the whole string
+                recInfo['Other Resource Amount'] = value
+    return recInfo
+
+def read_rec(path: str) -> dict:
+    """
+    Open a recommendation document and extract its information, used by process pool workers
+    :param path: Path to the recommendation .docx file
+    :return: Dictionary of recommendation information
+    """
+    import os
+    from docx import Document
+    return parse_rec(Document(path), os.path.basename(path))
+
+# en_US number formats, independent of the process locale
+INT_FORMAT = ',d'
+NUM_FORMAT = ',g'
+CURRENCY_FORMATS = {}
+
+def format_int(value) -> str:
+    """
+    Format an integer with thousand separator, like '%d' in en_US
+    :param value: Number, truncated to integer
+    :return: Formatted string
+    """
+    return format(int(value), INT_FORMAT)
+
+def format_num(value) -> str:
+    """
+    Format a number with thousand separator, like '%g' in en_US
+    :param value: Number
+    :return: Formatted string
+    """
+    return format(float(value), NUM_FORMAT)
+
+def format_currency(value, digits: int=0) -> str:
+    """
+    Format a number to currency string in en_US, e.g. $1,234 or -$1,234
+    :param value: Number
+    :param digits: Number of digits, default is 0
+    :return: Formatted string
+    """
+    if digits not in CURRENCY_FORMATS:
+        CURRENCY_FORMATS[digits] = ',.' + str(digits) + 'f'
+    sign = '-' if value < 0 else ''
+    return sign + '$' + format(abs(value), CURRENCY_FORMATS[digits])
 
 def grouping_num(dic: dict) -> dict:
     """
@@ -130,29 +387,23 @@ def grouping_num(dic: dict) -> dict:
     :param dic: EasyDict
     :return: Dictionary with keys in thousand separator
     """
-    import locale, numpy
-    
-    # Set locale to US
-    try:
-        locale.setlocale(locale.LC_ALL, "en_US")
-    except: # Linux?
-        locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
-
-    for key in dic.keys():
-        if type(dic[key]) == int or type(dic[key]) == numpy.int64:
-            dic[key] = locale.format_string('%d', dic[key], grouping=True)
-        elif type(dic[key]) == float or type(dic[key]) == numpy.float64:
-            dic[key] = locale.format_string('%g', dic[key], grouping=True)
-        # if dic[key] is a ndarray
-        elif type(dic[key]) == numpy.ndarray:
-            dic[key] = dic[key].tolist()
-            for i in range(len(dic[key])):
-                if type(dic[key][i]) == int:
-                    dic[key][i] = locale.format_string('%d', dic[key][i], grouping=True)
-                elif type(dic[key][i]) == float:
-                    dic[key][i] = locale.format_string('%g', dic[key][i], grouping=True)
-        else:
-            pass
+    import numpy
+    for key, value in dic.items():
+        kind = type(value)
+        if kind is int or kind is numpy.int64:
+            dic[key] = format(value, INT_FORMAT)
+        elif kind is float or kind is numpy.float64:
+            dic[key] = format(value, NUM_FORMAT)
+        # if value is a ndarray, format the whole array by dtype
+        elif kind is numpy.ndarray:
+            if value.dtype.kind in 'iu':
+                dic[key] = [format(v, INT_FORMAT) for v in value.tolist()]
+            elif value.dtype.kind == 'f':
+                dic[key] = [format(v, NUM_FORMAT) for v in value.tolist()]
+            else:
+                dic[key] = [format(v, INT_FORMAT) if type(v) is int else
+                            format(v, NUM_FORMAT) if type(v) is float else v
+                            for v in value.tolist()]
     return dic
 
 def dollar(varlist: list, dic: dict, digits: int=0) -> str:
@@ -163,7 +414,6 @@ def dollar(varlist: list, dic: dict, digits: int=0) -> str:
     :param digits: Number of digits, default is 0
     :return: Dictionary with keys in formatted currency string
     """
-    import locale
     # if varlist is not a list of strings
     if type(varlist) != list:
         raise Exception("Variable list must be a list of strings")
@@ -177,16 +427,9 @@ def dollar(varlist: list, dic: dict, digits: int=0) -> str:
         raise Exception("Digits must be a natural number")
     if digits < 0:
         raise Exception("Digits must be a natural number")
-    
-    # Set locale to US
-    try:
-        locale.setlocale(locale.LC_ALL, "en_US")
-    except: # Linux?
-        locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
-    
-    locale._override_localeconv={'frac_digits':digits}
+
     for var in varlist:
-        dic[var] = locale.currency(dic[var], grouping=True)
+        dic[var] = format_currency(dic[var], digits)
     return dic
 
 def combine_words(words: list) -> str:
@@ -211,6 +454,241 @@ def combine_words(words: list) -> str:
             pass
     return combined
 
+# Parsed templates and their pristine bodies, keyed by path
+_templates = {}
+# Tag indexes of the templates, keyed by path
+_template_tags = {}
+
+def load_template(path: str):
+    """
+    Parse a template once and hand out a fresh copy of its body on every call.
+    The same document object is reused, so it is only valid until the next call with the same path
+    :param path: Path to the template as string
+    :return: Document
+    """
+    import os
+    from copy import deepcopy
+    from docx import Document
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(key)
+    if key not in _templates or _templates[key][0] != mtime:
+        doc = Document(key)
+        _templates[key] = (mtime, doc, deepcopy(doc.element.body))
+    _, doc, pristine = _templates[key]
+    # Restore the body in place so cached python-docx proxies stay valid
+    body = doc.element.body
+    for child in list(body):
+        body.remove(child)
+    for child in pristine:
+        body.append(deepcopy(child))
+    return doc
+
+def compose_areas(composer, template: str, dic: dict, N: int, blocks=None):
+    """
+    Render the area template once per area and append it to the composer in memory
+    :param composer: docxcompose Composer
+    :param template: Path to the area template as string
+    :param dic: EasyDict, lists and arrays are split by area
+    :param N: Number of areas
+    :param blocks(optional): function of the area index returning a dictionary of docx_blocks flags
+    :return: None
+    """
+    import numpy as np
+    from easydict import EasyDict
+    from python_docx_replace import docx_blocks
+    for i in range(N):
+        sub = EasyDict()
+        sub.i = str(i+1)
+        # For any list or ndarray in dic, add corresponding values to sub
+        for j in dic:
+            if isinstance(dic[j], list) or isinstance(dic[j], np.ndarray):
+                sub[j] = dic[j][i]
+        # Fresh copy of the area template, parsed only once
+        doc = load_template(template)
+        if blocks is not None:
+            docx_blocks(doc, **blocks(i))
+            # Blocks move the tags, index this copy
+            index = None
+        else:
+            # Tags are indexed once per template
+            index = template_tags(template)
+        # Replacing keys
+        replace_tags(doc, sub, index)
+        composer.append(doc)
+
+def tag_roots(doc) -> list:
+    """
+    Elements searched for ${key} tags, the body, headers and footers like docx_replace
+    :param doc: Document
+    :return: List of elements
+    """
+    roots = [doc.element.body]
+    for section in doc.sections:
+        roots += [section.header._element, section.footer._element]
+    return roots
+
+def tag_paragraphs(root) -> list:
+    """
+    Paragraphs searched for ${key} tags like docx_replace, the paragraphs of the root and of the cells of its tables.
+    Paragraphs in nested tables and text boxes are not searched
+    :param root: Body, header or footer element
+    :return: List of paragraph elements
+    """
+    from docx.oxml.ns import qn
+    paragraphs = root.findall(qn('w:p'))
+    for tbl in root.findall(qn('w:tbl')):
+        for tr in tbl.findall(qn('w:tr')):
+            for tc in tr.findall(qn('w:tc')):
+                paragraphs += tc.findall(qn('w:p'))
+    return paragraphs
+
+def paragraph_runs(p) -> list:
+    """
+    Runs of a paragraph, including the runs in hyperlinks and tracked insertions,
+    but not the runs of paragraphs nested in text boxes
+    :param p: Paragraph element
+    :return: List of run elements
+    """
+    from docx.oxml.ns import qn
+    return [r for r in p.iter(qn('w:r')) if next(r.iterancestors(qn('w:p'))) is p]
+
+def compile_tags(doc) -> list:
+    """
+    Index the ${key} tags of a document and their run spans in one scan.
+    Paragraphs are located by position, so the index is valid for every fresh copy of the same template
+    :param doc: Document
+    :return: List of (root number, paragraph number, run texts, tag matches) of every tagged paragraph
+    """
+    import re
+    from docx.oxml.ns import qn
+    index = []
+    for root, element in enumerate(tag_roots(doc)):
+        for number, p in enumerate(tag_paragraphs(element)):
+            # Skip paragraphs without "$" in lxml, reading run texts is slow
+            if not any('$' in t.text for t in p.iter(qn('w:t')) if t.text):
+                continue
+            texts = [r.text for r in paragraph_runs(p)]
+            matches = list(re.finditer(r'\$\{([^{}]+)\}', ''.join(texts)))
+            if matches:
+                index.append((root, number, texts, matches))
+    return index
+
+def template_tags(path: str) -> list:
+    """
+    Tag index of a template loaded by load_template(), compiled once per template file.
+    Only valid until the copy is changed by something else, e.g. docx_blocks()
+    :param path: Path to the template as string
+    :return: Result of compile_tags()
+    """
+    import os
+    key = os.path.abspath(path)
+    mtime, doc, pristine = _templates[key]
+    if key not in _template_tags or _template_tags[key][0] != mtime:
+        _template_tags[key] = (mtime, compile_tags(doc))
+    return _template_tags[key][1]
+
+def replace_tags(doc, dic: dict, index: list=None) -> list:
+    """
+    Replace ${key} tags with the values of a dictionary in one pass, replaces docx_replace(doc, **dic).
+    Only the keys found in the document are converted to strings, a tag split across runs keeps the
+    format of its first run
+    :param doc: Document
+    :param dic: Dictionary of key to value
+    :param index(optional): Result of compile_tags() on the same document or a fresh copy of its template
+    :return: List of keys without a value, their tags are left in the document
+    """
+    from bisect import bisect_right
+    if index is None:
+        index = compile_tags(doc)
+    roots = tag_roots(doc) if index else []
+    paragraphs = {}
+    unresolved = []
+    for root, number, texts, matches in index:
+        if root not in paragraphs:
+            paragraphs[root] = tag_paragraphs(roots[root])
+        runs = paragraph_runs(paragraphs[root][number])
+        texts = list(texts)
+        # Start of every run in the paragraph text
+        starts = [0]
+        for text in texts:
+            starts.append(starts[-1] + len(text))
+        changed = set()
+        # Right to left, the offsets on the left stay valid
+        for match in reversed(matches):
+            key = match.group(1)
+            if key not in dic:
+                unresolved.append(key)
+                continue
+            begin, end = match.span()
+            first = bisect_right(starts, begin) - 1
+            last = bisect_right(starts, end - 1) - 1
+            tail = texts[last][end - starts[last]:]
+            texts[first] = texts[first][:begin - starts[first]] + str(dic[key]) + (tail if first == last else '')
+            for i in range(first + 1, last + 1):
+                texts[i] = tail if i == last else ''
+            changed.update(range(first, last + 1))
+        for i in changed:
+            runs[i].text = texts[i]
+    unresolved = sorted(set(unresolved))
+    if unresolved:
+        caveat("Tags without a value are left in the document: " + ", ".join('${' + key + '}' for key in unresolved))
+    return unresolved
+
+def tag_index(doc, tags: list) -> dict:
+    """
+    Find the first paragraph containing each tag in one scan of the document
+    :param doc: Document
+    :param tags: List of tags as strings
+    :return: Dictionary of tag to paragraph, missing tags are left out
+    """
+    remaining = set(tags)
+    index = {}
+    for p in doc.paragraphs:
+        if not remaining:
+            break
+        text = p.text
+        for tag in [tag for tag in remaining if tag in text]:
+            index[tag] = p
+            remaining.discard(tag)
+    return index
+
+def add_tags(doc, iac: dict=None, images: dict={}, eqns: dict={}):
+    """
+    Add images and equations to Word document in one scan, replacing their tags.
+    Every missing tag and image file is reported together before anything is inserted
+    :param doc: Document
+    :param iac(optional): EasyDict, equation tags are cleared from it
+    :param images(optional): Dictionary of image tag to (image path, width)
+    :param eqns(optional): Dictionary of equation tag to LaTeX equation
+    :return: None
+    """
+    import os
+    for tag in list(images) + list(eqns):
+        # if tag is not a string
+        if type(tag) != str:
+            raise Exception("Tag must be a string")
+    if eqns and iac is None:
+        raise Exception("Equations require the iac dictionary")
+    errors = []
+    for tag, (image_path, wd) in images.items():
+        # if image file is not found
+        if os.path.isfile(image_path) == False:
+            errors.append("Image file " + image_path + " not found")
+    index = tag_index(doc, list(images) + list(eqns))
+    missing = [tag for tag in list(images) + list(eqns) if tag not in index]
+    if missing:
+        errors.append("Tag "+ ", ".join(missing) +" not found")
+    if errors:
+        raise Exception("\n".join(errors))
+    for tag, (image_path, wd) in images.items():
+        p = index[tag]
+        p.text = p.text.replace(tag, '')
+        r = p.add_run()
+        r.add_picture(image_path, width=wd)
+    for tag, eqn_input in eqns.items():
+        iac[tag.strip('${}')] = ''
+        index[tag]._element.append(latex2word(eqn_input))
+
 def add_image(doc, tag: str, image_path: str, wd):
     """
     Add image to Word document, search for tag in doc and replace with the image
@@ -220,24 +698,16 @@ def add_image(doc, tag: str, image_path: str, wd):
     :param wd: Image width
     :return: None
     """
-    import os
-    # if tag is not a string
-    if type(tag) != str:
-        raise Exception("Tag must be a string")
-    # if image file is not found
-    if os.path.isfile(image_path) == False:
-        raise Exception("Image file not found")
-    found_tag = False
-    for p in doc.paragraphs:
-        if tag in p.text:
-            p.text = p.text.replace(tag, '')
-            r = p.add_run()
-            r.add_picture(image_path, width=wd)
-            found_tag = True
-            break
-    if found_tag == False:
-        # Throw error if tag is not found 
-        raise Exception("Tag "+ tag +" not found")
+    add_tags(doc, images={tag: (image_path, wd)})
+
+def add_images(doc, images: dict):
+    """
+    Add images to Word document in one scan of the paragraphs
+    :param doc: Document
+    :param images: Dictionary of image tag to (image path, width)
+    :return: None
+    """
+    add_tags(doc, images=images)
 
 def add_eqn(doc, iac:dict, tag: str, eqn_input):
     """
@@ -245,42 +715,58 @@ def add_eqn(doc, iac:dict, tag: str, eqn_input):
     :param doc: Document
     :param iac: EasyDict
     :param tag: Equation tag as string
-    :param eqn_input: Word Equation object
+    :param eqn_input: LaTeX equation as a string
     :return: None
     """
-    # if tag is not a string
-    if type(tag) != str:
-        raise Exception("Tag must be a string")
-    found_tag = False
-    for p in doc.paragraphs:
-        if tag in p.text:
-            iac[tag.strip('${}')] = ''
-            word_math = latex2word(eqn_input)
-            p._element.append(word_math)
-            found_tag = True
-            break
-    if found_tag == False:
-        # Throw error if tag is not found 
-        raise Exception("Tag "+ tag +" not found")
-    
+    add_tags(doc, iac, eqns={tag: eqn_input})
+
+def add_eqns(doc, iac:dict, eqns: dict):
+    """
+    Add equations to Word document in one scan of the paragraphs
+    :param doc: Document
+    :param iac: EasyDict
+    :param eqns: Dictionary of equation tag to LaTeX equation
+    :return: None
+    """
+    add_tags(doc, iac, eqns=eqns)
+
+# Compiled MML2OMML stylesheet, loaded on first use
+_mml2omml = None
+
+def mml2omml():
+    """
+    Compile the MathML to Office MathML stylesheet once per process
+    :return: XSLT transform
+    """
+    import os
+    from lxml import etree
+    global _mml2omml
+    if _mml2omml is None:
+        script_path = os.path.dirname(os.path.abspath(__file__))
+        _mml2omml = etree.XSLT(etree.parse(os.path.join(script_path, 'MML2OMML.XSL')))
+    return _mml2omml
+
+# Converted equations keyed by LaTeX string
+_equations = {}
+
 def latex2word(latex_input: str):
     """
     Convert LaTeX equation to Word equation
     :param latex_input: LaTeX equation as a string
     :return: Word equation object
     """
-    import os, latex2mathml.converter
-    from lxml import etree
+    from copy import deepcopy
     #if latex input is not a string
     if type(latex_input) != str:
         raise Exception("LaTeX equation must be a string")
-    mathml = latex2mathml.converter.convert(latex_input)
-    tree = etree.fromstring(mathml)
-    script_path = os.path.dirname(os.path.abspath(__file__))
-    xslt = etree.parse(os.path.join(script_path,'..','Shared','MML2OMML.XSL'))
-    transform = etree.XSLT(xslt)
-    new_dom = transform(tree)
-    return new_dom.getroot()
+    if latex_input not in _equations:
+        import latex2mathml.converter
+        from lxml import etree
+        mathml = latex2mathml.converter.convert(latex_input)
+        tree = etree.fromstring(mathml)
+        _equations[latex_input] = mml2omml()(tree).getroot()
+    # Inserting an element moves it, so hand out a copy
+    return deepcopy(_equations[latex_input])
 
 def payback(ACS, IC) -> str:
     """
@@ -322,4 +808,67 @@ def caveat(info: str):
     Print caveats with highlighting
     :param info: information to be printed
     """
-    print("\033[94m\033[103m{}\033[0m\033[0m".format(info))
\ No newline at end of file
+    print("\033[94m\033[103m{}\033[0m\033[0m".format(info))
+
+def file_hash(path: str) -> str:
+    """
+    Hash the content of a file
+    :param path: Path to the file as string
+    :return: SHA-256 hex digest of the file content
+    """
+    import hashlib
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def cache_path(name: str) -> str:
+    """
+    Path of a file in the .cache folder at the root of the repository
+    :param name: File name as string
+    :return: Path to the cache file as string
+    """
+    import os
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', name)
+
+def load_cache(name: str) -> dict:
+    """
+    Load a json cache from the .cache folder
+    :param name: Cache name as string
+    :return: Cached dictionary, empty if the cache doesn't exist or is unreadable
+    """
+    import json
+    try:
+        with open(cache_path(name + '.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(name: str, data: dict):
+    """
+    Save a json cache to the .cache folder, the file is replaced atomically
+    :param name: Cache name as string
+    :param data: Dictionary to be saved
+    """
+    import os, json, tempfile
+    path = cache_path(name + '.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+def build_key(values, files: list = []) -> str:
+    """
+    Hash the inputs of a build step
+    :param values: json serializable values, other types (e.g. numpy numbers) are converted to strings
+    :param files: List of input file paths
+    :return: SHA-256 hex digest of all inputs
+    """
+    import hashlib, json
+    sha = hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode())
+    for path in files:
+        sha.update(path.encode())
+        sha.update(file_hash(path).encode())
+    return sha.hexdigest()
@@ -0,0 +1,79 @@
+"""
+(Purpose) ImportTime.py checks the startup import time of every template and Compiler.py against a budget
+Usage: python -m Shared.ImportTime [-v]
+The entry path of a template is importing its automate.py and loading its database, so a mistyped database
+fails before python-docx, numpy or network clients are imported. Those must be imported where they are used.
+"""
+
+import os, sys, subprocess, argparse
+
+# Repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time budget of a template entry path, ms
+TEMPLATE_BUDGET = 100
+# Import time budget of Compiler.py before it checks Description.docx, ms
+COMPILER_BUDGET = 300
+
+def import_times(code: str) -> dict:
+    """
+    Run code in a fresh interpreter with -X importtime
+    :param code: Python code as string
+    :return: Dictionary of top level module to cumulative import time, us
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Skip the header, nested imports are indented
+        if not cumulative.strip().isdigit() or name.startswith('  '):
+            continue
+        times[name.strip()] = int(cumulative)
+    return times
+
+def measure(code: str, baseline: dict) -> tuple:
+    """
+    Measure the import time of code on top of the interpreter startup
+    :param code: Python code as string
+    :param baseline: Dictionary returned by import_times('pass')
+    :return: Total import time in ms and dictionary of the slowest modules
+    """
+    times = {name: us for name, us in import_times(code).items() if name not in baseline}
+    slowest = dict(sorted(times.items(), key=lambda item: -item[1])[:3])
+    return sum(times.values()) / 1000, slowest
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the startup import time of templates and Compiler.py")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show the slowest imports of every entry")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from Shared.Templates import TEMPLATES
+    baseline = import_times('pass')
+    entries = []
+    for ARC, folder in TEMPLATES.items():
+        code = ("from Shared.Templates import template_module, template_inputs\n"
+                "template_module('" + ARC + "')\ntemplate_inputs('" + ARC + "')")
+        entries.append((folder, code, TEMPLATE_BUDGET))
+    entries.append(('Compiler.py', 'import Compiler', COMPILER_BUDGET))
+
+    over = []
+    for name, code, budget in entries:
+        ms, slowest = measure(code, baseline)
+        status = "ok" if ms <= budget else "OVER"
+        print("{0:>7.1f} ms / {1} ms  {2:4}  {3}".format(ms, budget, status, name))
+        if args.verbose or ms > budget:
+            for module, us in slowest.items():
+                print("           {0:>7.1f} ms  {1}".format(us / 1000, module))
+        if ms > budget:
+            over.append(name)
+    if over:
+        raise Exception("Import time over budget: " + ", ".join(over))
+
+if __name__ == '__main__':
+    main()
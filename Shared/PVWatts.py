@@ -0,0 +1,131 @@
+"""
+(Purpose) PVWatts.py runs the NREL PVWatts v8 API with a local response cache
+Responses are kept in .cache/pvwatts.json per kW of capacity. PVWatts output is linear in system capacity,
+so the response of a site and array is scaled to every capacity instead of calling the API again.
+"""
+
+URL = 'https://developer.nrel.gov/api/pvwatts/v8.json'
+# Connect and read timeouts, s
+TIMEOUT = (5, 30)
+# Default array parameters
+ARRAY = {'module_type': 0, 'losses': 14.08, 'array_type': 0, 'tilt': 20, 'azimuth': 180}
+# Typical monthly solar radiation (kWh/m2/day) and shape of the monthly AC output in eastern PA,
+# only used for the monthly table when the annual output is entered manually
+SOLRAD = [2.49, 3.42, 4.24, 5.07, 5.73, 5.89, 6.30, 5.60, 4.72, 3.64, 2.96, 1.98]
+AC_SHAPE = [10762, 13137, 17398, 19346, 21770, 21224, 23189, 20814, 17107, 14396, 11782, 8576]
+
+# Shared HTTP session
+_session = None
+
+def site_key(ZIP: str, array: dict) -> str:
+    """
+    Cache key of a site and array, without the capacity
+    :param ZIP: ZIP code as string
+    :param array: Dictionary of array parameters
+    :return: Key as string
+    """
+    return '|'.join([str(ZIP)] + [str(array[name]) for name in sorted(ARRAY)])
+
+def fetch(ZIP: str, capacity: float, api_key: str, array: dict) -> dict:
+    """
+    Call the PVWatts API, reusing the connection
+    :param ZIP: ZIP code as string
+    :param capacity: System capacity, kW
+    :param api_key: NREL API key as string
+    :param array: Dictionary of array parameters
+    :return: Dictionary with ac_annual, ac_monthly and solrad_monthly
+    """
+    global _session
+    import requests
+    if _session is None:
+        _session = requests.Session()
+    parameters = dict(array, format='json', api_key=api_key, system_capacity=capacity, address=ZIP)
+    response = _session.get(URL, params=parameters, timeout=TIMEOUT)
+    response.raise_for_status()
+    outputs = response.json().get('outputs') or {}
+    if not all(name in outputs for name in ['ac_annual', 'ac_monthly', 'solrad_monthly']):
+        raise Exception("PVWatts returned no outputs: " + str(response.json().get('errors')))
+    return {name: outputs[name] for name in ['ac_annual', 'ac_monthly', 'solrad_monthly']}
+
+def scale(outputs: dict, ratio: float) -> dict:
+    """
+    Scale PVWatts outputs to another capacity
+    :param outputs: Dictionary with ac_annual, ac_monthly and solrad_monthly
+    :param ratio: New capacity / old capacity, or the capacity for outputs per kW
+    :return: Dictionary with ac_annual, ac_monthly and solrad_monthly
+    """
+    return {'ac_annual': outputs['ac_annual'] * ratio,
+            'ac_monthly': [value * ratio for value in outputs['ac_monthly']],
+            'solrad_monthly': list(outputs['solrad_monthly'])}
+
+def pvwatts(ZIP: str, capacity: float, api_key: str, manual: float=0, **array) -> dict:
+    """
+    Estimate the output of a PV system, calling the API at most once per site and array
+    :param ZIP: ZIP code as string
+    :param capacity: System capacity, kW
+    :param api_key: NREL API key as string
+    :param manual(optional): Annual output per kW from the PVWatts website (kWh/kW), used if the API can't be reached,
+    required in that case
+    :param array(optional): module_type, losses, array_type, tilt and azimuth, see ARRAY for defaults
+    :return: Dictionary with ac_annual, ac_monthly, solrad_monthly and source ('cache', 'api' or 'manual')
+    """
+    from Shared.IAC import load_cache, save_cache, caveat
+    array = dict(ARRAY, **array)
+    key = site_key(ZIP, array)
+    cache = load_cache('pvwatts')
+    if 'per_kW' in cache.get(key, {}):
+        return dict(scale(cache[key]['per_kW'], capacity), source='cache')
+    try:
+        # Output of 1 kW, scaled to the capacity
+        outputs = fetch(ZIP, 1, api_key, array)
+    except Exception as error:
+        if not manual:
+            raise Exception("PVWatts API error: " + str(error) + ". Please set YIELD in the database to the annual "
+                            "output per kW from the PVWatts website, or fill .cache/pvwatts.json.")
+        caveat("PVWatts API error: " + str(error))
+        caveat("The monthly AC output follows a typical eastern PA year, please update the table if necessary.")
+        perkW = {'ac_annual': manual,
+                 'ac_monthly': [value * manual / sum(AC_SHAPE) for value in AC_SHAPE],
+                 'solrad_monthly': list(SOLRAD)}
+        return dict(scale(perkW, capacity), source='manual')
+    cache[key] = {'per_kW': outputs}
+    save_cache('pvwatts', cache)
+    return dict(scale(outputs, capacity), source='api')
+
+def orientation_factors(lat: float, tilts, azimuths, tilt: float=20, azimuth: float=180):
+    """
+    Annual plane of array irradiance of several orientations relative to a reference array
+    Hourly sun positions of a year with an isotropic clear sky model, used to scale cached PVWatts output
+    :param lat: Latitude
+    :param tilts: Tilt angles, deg, array of T
+    :param azimuths: Azimuth angles clockwise from north, deg, array of A
+    :param tilt(optional): Tilt of the reference array, deg
+    :param azimuth(optional): Azimuth of the reference array, deg
+    :return: numpy array of T x A factors, 1 for the reference array
+    """
+    import numpy as np
+    # Middle of every hour of the year, solar time
+    day = np.arange(8760) // 24 + 1
+    hour = np.arange(8760) % 24 + 0.5
+    declination = np.radians(23.45 * np.sin(np.radians(360 * (284 + day) / 365)))
+    omega = np.radians(15 * (hour - 12))
+    phi = np.radians(lat)
+    # cos(incidence) = cos(tilt) * A + sin(tilt) * (cos(gamma) * B + sin(gamma) * C), A is cos(zenith)
+    A = np.sin(declination) * np.sin(phi) + np.cos(declination) * np.cos(phi) * np.cos(omega)
+    B = np.cos(declination) * np.sin(phi) * np.cos(omega) - np.sin(declination) * np.cos(phi)
+    C = np.cos(declination) * np.sin(omega)
+    # Clear sky beam and diffuse irradiance while the sun is up, W/m2
+    up = A > 0.01
+    A, B, C = A[up], B[up], C[up]
+    beam = 1353 * 0.7 ** ((1 / A) ** 0.678)
+    diffuse = 0.1 * beam
+    ground = 0.2 * (beam * A + diffuse)
+
+    def annual(tilts, azimuths):
+        beta = np.radians(np.asarray(tilts, dtype=float))[:, None, None]
+        gamma = np.radians(np.asarray(azimuths, dtype=float) - 180)[None, :, None]
+        incidence = np.cos(beta) * A + np.sin(beta) * (np.cos(gamma) * B + np.sin(gamma) * C)
+        poa = beam * np.maximum(incidence, 0) + (diffuse * (1 + np.cos(beta)) + ground * (1 - np.cos(beta))) / 2
+        return poa.sum(axis=-1)
+
+    return annual(tilts, azimuths) / annual([tilt], [azimuth])[0, 0]
@@ -0,0 +1,82 @@
+"""
+(Purpose) Templates.py maps ARC numbers to recommendation templates and loads them as modules
+Every template exposes calculate(inputs) -> results and render(results) -> Document, e.g.
+
+    led = template_module('2.7142.3')
+    results = led.calculate(template_inputs('2.7142.3'))
+    doc = led.render(results)
+"""
+
+# Full ARC number to template folder, relative to the repository root
+# The application code is needed, e.g. 2.4146.1 and 2.4146.2 are different templates
+TEMPLATES = {
+    '2.1233.2': 'Boiler/Install Air-Fuel Ratio Controller',
+    '2.2442.2': 'Boiler/Recover Exhaust Gas Heat',
+    '2.2443.1': 'Compressor/Exhuast Heat',
+    '2.4146.2': 'Compressor/Existing Compressor VFD',
+    '2.4221.2': 'Compressor/Intake Air',
+    '2.4226.2': 'Compressor/New Compressor VFD',
+    '2.4231.2': 'Compressor/Reduce Set Pressure',
+    '2.4236.2': 'Compressor/Repair Leaks',
+    '2.2523.3': 'HVAC/Install Air Curtain for Doorways',
+    '2.2511.1': 'HVAC/Insulate Bare Equipment',
+    '2.7261.3': 'HVAC/Programmable Thermostat',
+    '2.7232.3': 'HVAC/Replace Old HVAC Units',
+    '2.7135.3': 'Lighting/Install Motion Sensor',
+    '2.7142.3': 'Lighting/LED',
+    '2.7312.3': 'Motor/Big Ass Fan',
+    '2.4111.2': 'Motor/Replace Cogged V-Belts',
+    '2.4146.1': 'Motor/Single Motor VFD',
+    '2.8114.4': 'Others/Negotiate Energy Charge',
+    '2.9112.2': 'Others/Solar Panel'
+}
+
+# Loaded template modules by ARC number
+_modules = {}
+
+def template_folder(ARC: str) -> str:
+    """
+    Find the folder of a template
+    :param ARC: Full ARC as a string
+    :return: Absolute path to the template folder
+    """
+    import os
+    if ARC not in TEMPLATES:
+        raise Exception("No template for ARC " + str(ARC) + ".")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(root, *TEMPLATES[ARC].split('/'))
+
+def template_module(ARC: str):
+    """
+    Import the automate.py of a template once, without running it as a script
+    :param ARC: Full ARC as a string
+    :return: Module with calculate() and render()
+    """
+    import os, sys, importlib.util
+    if ARC not in _modules:
+        folder = template_folder(ARC)
+        name = 'templates.' + ARC.replace('.', '_')
+        spec = importlib.util.spec_from_file_location(name, os.path.join(folder, 'automate.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        # Some templates import helper modules from their own folder
+        sys.path.insert(0, folder)
+        try:
+            spec.loader.exec_module(module)
+        except:
+            del sys.modules[name]
+            raise
+        finally:
+            sys.path.remove(folder)
+        _modules[ARC] = module
+    return _modules[ARC]
+
+def template_inputs(ARC: str) -> dict:
+    """
+    Load utility cost and the database of a template
+    :param ARC: Full ARC as a string
+    :return: EasyDict, can be modified before calling calculate()
+    """
+    import os
+    from Shared.IAC import load_database
+    return load_database(os.path.join(template_folder(ARC), 'database.json5'))
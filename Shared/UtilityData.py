@@ -0,0 +1,143 @@
+"""
+(Purpose) UtilityData.py reads the utility bills in Energy Charts.xlsx for Utility.py and Compiler.py
+Only the bills and the fuel conversion table entered in the Raw Data sheet are streamed, in read-only mode, and computed by Shared/Bills.py,
+so the workbook doesn't need to be recalculated by Excel. The utility model is cached in .cache/utility.json
+by workbook content, and Utility.json5 is a projection of it.
+"""
+
+import os
+
+# Workbook in the repository root, independent of the working directory
+WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Energy Charts', 'Energy Charts.xlsx')
+
+# Inputs of the Raw Data sheet, the formulas are computed by Shared/Bills.py
+FUEL_CELLS = {
+    'FuelType': 'Q2',
+    'FuelUnit': 'Q3',
+    'start': 'Q5'       # First billing month
+}
+# Monthly bills from row 7 until the Total row, 12 or more months
+FIRST_ROW = 7
+TOTAL = 'Total'
+# Column with the month labels and the Total row
+LABEL_COLUMN = 'B'
+BILL_COLUMNS = {
+    'kWh': 'C',
+    'EUsageCost': 'D',
+    'kW': 'E',
+    'EDemandCost': 'F',
+    'ETotalCost': 'H',
+    'FuelUsage': 'L',
+    'FuelCost': 'N'
+}
+# Fuel conversion table, MMBtu per unit, fuels in the first column and units in the first row
+FACTOR_TABLE = 'P6:W14'
+
+# Bump when the model changes
+VERSION = 3
+
+def read_bills(path: str=WORKBOOK):
+    """
+    Stream the monthly bills and the fuel conversion table entered in the workbook
+    :param path: Path to Energy Charts.xlsx
+    :return: (pandas DataFrame of bills, FuelType, FuelUnit, first billing month, fuel factors)
+    """
+    import openpyxl
+    import pandas as pd
+    from openpyxl.utils.cell import range_boundaries, coordinate_to_tuple, column_index_from_string
+    minCol, minRow, maxCol, maxRow = range_boundaries(FACTOR_TABLE)
+    fuelCells = {key: coordinate_to_tuple(cell) for key, cell in FUEL_CELLS.items()}
+    label = column_index_from_string(LABEL_COLUMN) - 1
+    columns = {key: column_index_from_string(column) - 1 for key, column in BILL_COLUMNS.items()}
+    lastCol = max([maxCol, label + 1] + [col + 1 for col in columns.values()] + [col for row, col in fuelCells.values()])
+    fuel, table, rows = {}, [], []
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ended = False
+        for row, line in enumerate(wb['Raw Data'].iter_rows(max_col=lastCol, values_only=True), start=1):
+            line = list(line) + [None] * (lastCol - len(line))
+            for key, (r, c) in fuelCells.items():
+                if r == row:
+                    fuel[key] = line[c - 1]
+            if minRow <= row <= maxRow:
+                table.append(line[minCol - 1:maxCol])
+            if row >= FIRST_ROW and not ended:
+                bill = [line[col] for col in columns.values()]
+                # Bills end at the Total row, or at the first empty row if the labels were not calculated
+                if str(line[label]).strip() == TOTAL or all(value is None for value in bill):
+                    ended = True
+                else:
+                    rows.append(bill)
+            if ended and row >= maxRow:
+                break
+    finally:
+        wb.close()
+    bills = pd.DataFrame(rows, columns=list(columns))
+    # Empty cells are zero in Excel
+    bills = bills.fillna(0)
+    # MMBtu per unit, e.g. factors['Natural Gas']['Mcf']
+    units = table[0][1:]
+    factors = {line[0]: {unit: value for unit, value in zip(units, line[1:]) if unit is not None and value is not None}
+               for line in table[1:] if line[0] is not None}
+    return bills, fuel['FuelType'], fuel['FuelUnit'], fuel['start'], factors
+
+def read_utility(path: str=WORKBOOK) -> dict:
+    """
+    Compute the utility model from the bills in the workbook
+    :param path: Path to Energy Charts.xlsx
+    :return: EasyDict of rates, totals and the Electricity and Fuel monthly tables
+    """
+    from Shared.Bills import analyze_bills
+    return analyze_bills(*read_bills(path))
+
+def load_utility(path: str=WORKBOOK) -> dict:
+    """
+    Load the utility model, reading the workbook only if it changed
+    :param path: Path to Energy Charts.xlsx
+    :return: EasyDict of rates, totals and the Electricity and Fuel monthly tables
+    """
+    from easydict import EasyDict
+    from Shared.IAC import load_cache, save_cache, file_hash
+    key = file_hash(path)
+    cache = load_cache('utility')
+    if cache.get('version') == VERSION and cache.get('hash') == key:
+        return EasyDict(cache['model'])
+    model = read_utility(path)
+    save_cache('utility', {'version': VERSION, 'hash': key, 'model': model})
+    return model
+
+def project_utility(model: dict) -> dict:
+    """
+    Project the utility model to the values of Utility.json5
+    :param model: Utility model
+    :return: Dictionary of Utility.json5 keys
+    """
+    from Shared.IAC import caveat
+    values = {
+        'FuelType': model.FuelType,
+        'FuelUnit': model.FuelUnit,
+        'StartMo': model.StartMo,
+        'EndMo': model.EndMo,
+        'TotalEkWh': round(model.TotalEkWh),
+        'TotalEBtu': round(model.TotalEBtu),
+        'TotalDkW': round(model.TotalDkW),
+        # Fees are part of the electricity cost
+        'TotalECost': round(model.EUsageCost + model.EDemandCost + round(model.Fees, 2)),
+        'TotalFBtu': round(model.TotalFBtu),
+        'TotalFCost': round(model.FuelCost),
+        'TotalBtu': round(model.TotalBtu),
+        'TotalCost': round(model.TotalCost)
+    }
+    # Rates without usage are left as they are in Utility.json5
+    rates = {'EC': (model.EC, 3), 'DC': (model.DC, 2), 'FC': (model.FC, 2)}
+    for key, (value, digits) in rates.items():
+        if value is None:
+            caveat(key + " can't be calculated without usage in the bills, the old value in Utility.json5 is kept.")
+        else:
+            values[key] = round(value, digits)
+    # Natural Gas Cost for compatibility
+    if model.FuelType != 'Natural Gas':
+        values['NGC'] = 0
+    elif 'FC' in values:
+        values['NGC'] = values['FC']
+    return values
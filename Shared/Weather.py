@@ -0,0 +1,235 @@
+"""
+(Purpose) Weather.py keeps a local store of ZIP code locations, monthly average and hourly temperatures
+Data is kept in .cache/weather.sqlite, so repeated plants in the same region resolve offline.
+Usage: python -m Shared.Weather ZIP [ZIP ...] fills the store before going to the field.
+"""
+
+from datetime import datetime
+from contextlib import closing
+
+# Default window of monthly averages
+START = datetime(2018, 10, 1)
+END = datetime(2022, 5, 31)
+# Default year of hourly temperatures
+YEAR = 2021
+# Refresh stored data after this many days, stale data is still used when offline
+TTL = 365
+# Coordinates are rounded to share data within about 1 km
+DIGITS = 2
+
+def locate_pgeocode(ZIP: str) -> tuple:
+    """
+    Default location fetcher using pgeocode
+    :param ZIP: US ZIP code as string
+    :return: (latitude, longitude)
+    """
+    import math, pgeocode
+    query = pgeocode.Nominatim('us').query_postal_code(ZIP)
+    if math.isnan(query['latitude']) or math.isnan(query['longitude']):
+        raise Exception("ZIP code " + ZIP + " not found.")
+    return query['latitude'], query['longitude']
+
+def fetch_meteostat(lat: float, lon: float, start: datetime, end: datetime) -> dict:
+    """
+    Default temperature fetcher using meteostat
+    :param lat: Latitude
+    :param lon: Longitude
+    :param start: First month as datetime
+    :param end: Last month as datetime
+    :return: Dictionary of month as 'YYYY-MM' to average temperature in degC, None if missing
+    """
+    import math
+    from meteostat import Point, Monthly
+    df = Monthly(Point(lat, lon), start, end).fetch()
+    tavg = {}
+    for time, value in df['tavg'].items():
+        tavg[time.strftime('%Y-%m')] = None if math.isnan(value) else float(value)
+    return tavg
+
+def fetch_meteostat_hourly(lat: float, lon: float, year: int) -> list:
+    """
+    Default hourly temperature fetcher using meteostat
+    :param lat: Latitude
+    :param lon: Longitude
+    :param year: Year, int
+    :return: List of 8760 temperatures in degC from local midnight on January 1st, None if missing
+    """
+    import math
+    from meteostat import Point, Hourly, Stations
+    # Schedules are in local clock hours, meteostat is in UTC unless a timezone is given
+    station = Stations().nearby(lat, lon).fetch(1)
+    timezone = station['timezone'].iloc[0] if len(station) > 0 else None
+    df = Hourly(Point(lat, lon), datetime(year, 1, 1), datetime(year, 12, 31, 23, 59), timezone=timezone).fetch()
+    temp = [None] * 8760
+    for time, value in df['temp'].items():
+        time = time.replace(tzinfo=None)
+        # Skip February 29th so every year has 8760 hours, and hours of other years
+        if time.year != year or (time.month == 2 and time.day == 29):
+            continue
+        hour = (time.replace(year=2001) - datetime(2001, 1, 1)).days * 24 + time.hour
+        if not math.isnan(value):
+            temp[hour] = float(value)
+    return temp
+
+def months(start: datetime, end: datetime) -> list:
+    """
+    List the months between two dates
+    :param start: datetime
+    :param end: datetime
+    :return: List of months as 'YYYY-MM'
+    """
+    result = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        result.append('{0:04d}-{1:02d}'.format(year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return result
+
+def connect():
+    """
+    Open the weather store, creating it if necessary
+    :return: sqlite3 connection, to be closed by the caller
+    """
+    import os, sqlite3
+    from Shared.IAC import cache_path
+    path = cache_path('weather.sqlite')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS location (zip TEXT PRIMARY KEY, lat REAL, lon REAL, fetched REAL)")
+    # Hours in local time, the UTC rows of the former hourly table are not used
+    conn.execute("CREATE TABLE IF NOT EXISTS hourly_local (lat REAL, lon REAL, year INTEGER, temp BLOB, fetched REAL, "
+                 "PRIMARY KEY (lat, lon, year))")
+    conn.execute("CREATE TABLE IF NOT EXISTS tavg (lat REAL, lon REAL, month TEXT, tavg REAL, fetched REAL, "
+                 "PRIMARY KEY (lat, lon, month))")
+    return conn
+
+def locate(ZIP: str, fetcher=locate_pgeocode, ttl: float=TTL) -> tuple:
+    """
+    Find the coordinates of a ZIP code, from the store if possible
+    :param ZIP: US ZIP code as string
+    :param fetcher(optional): function of ZIP returning (latitude, longitude)
+    :param ttl(optional): Days before refreshing stored coordinates
+    :return: (latitude, longitude) rounded to DIGITS
+    """
+    import time
+    ZIP = str(ZIP).strip()
+    with closing(connect()) as conn, conn:
+        row = conn.execute("SELECT lat, lon, fetched FROM location WHERE zip = ?", (ZIP,)).fetchone()
+        if row is not None and time.time() - row[2] < ttl * 86400:
+            return row[0], row[1]
+        try:
+            lat, lon = fetcher(ZIP)
+        except Exception as error:
+            if row is None:
+                raise Exception("Can't locate ZIP code " + ZIP + " offline: " + str(error))
+            # Stale coordinates are better than none
+            return row[0], row[1]
+        lat, lon = round(float(lat), DIGITS), round(float(lon), DIGITS)
+        conn.execute("INSERT OR REPLACE INTO location VALUES (?, ?, ?, ?)", (ZIP, lat, lon, time.time()))
+    return lat, lon
+
+def monthly_tavg(lat: float, lon: float, start: datetime=START, end: datetime=END,
+                 fetcher=fetch_meteostat, ttl: float=TTL) -> dict:
+    """
+    Monthly average temperatures at a location, from the store if possible
+    :param lat: Latitude
+    :param lon: Longitude
+    :param start(optional): First month as datetime
+    :param end(optional): Last month as datetime
+    :param fetcher(optional): function of (lat, lon, start, end) returning {'YYYY-MM': degC or None}
+    :param ttl(optional): Days before refreshing stored temperatures
+    :return: Dictionary of month as 'YYYY-MM' to average temperature in degC, None if missing
+    """
+    import time
+    lat, lon = round(float(lat), DIGITS), round(float(lon), DIGITS)
+    wanted = months(start, end)
+    with closing(connect()) as conn, conn:
+        rows = conn.execute("SELECT month, tavg, fetched FROM tavg WHERE lat = ? AND lon = ? AND month BETWEEN ? AND ?",
+                            (lat, lon, wanted[0], wanted[-1])).fetchall()
+        stored = {month: (value, fetched) for month, value, fetched in rows}
+        complete = all(month in stored for month in wanted)
+        fresh = complete and all(time.time() - stored[month][1] < ttl * 86400 for month in wanted)
+        if fresh:
+            return {month: stored[month][0] for month in wanted}
+        try:
+            fetched = fetcher(lat, lon, start, end)
+        except Exception as error:
+            if not complete:
+                raise Exception("No stored temperatures for ({0}, {1}) and can't fetch them: {2}".format(lat, lon, error))
+            # Stale temperatures are better than none
+            return {month: stored[month][0] for month in wanted}
+        now = time.time()
+        # Months without data are stored as NULL so they are not fetched again
+        conn.executemany("INSERT OR REPLACE INTO tavg VALUES (?, ?, ?, ?, ?)",
+                         [(lat, lon, month, fetched.get(month), now) for month in wanted])
+    return {month: fetched.get(month) for month in wanted}
+
+def average_temperature(ZIP: str, start: datetime=START, end: datetime=END) -> float:
+    """
+    Average outdoor temperature of a ZIP code over a window of months
+    :param ZIP: US ZIP code as string
+    :param start(optional): First month as datetime
+    :param end(optional): Last month as datetime
+    :return: Average temperature in degF
+    """
+    import numpy as np
+    lat, lon = locate(ZIP)
+    tavg = [value for value in monthly_tavg(lat, lon, start, end).values() if value is not None]
+    if len(tavg) == 0:
+        raise Exception("No temperature data for ZIP code " + str(ZIP) + ".")
+    # Convert to degF
+    return np.mean(np.array(tavg) * 9/5 + 32).item()
+
+def hourly_temperature(ZIP: str, year: int=YEAR, fetcher=fetch_meteostat_hourly, ttl: float=TTL):
+    """
+    Hourly outdoor temperature profile of a ZIP code, from the store if possible
+    :param ZIP: US ZIP code as string
+    :param year(optional): Year, int
+    :param fetcher(optional): function of (lat, lon, year) returning 8760 temperatures in degC from local midnight,
+    None if missing
+    :param ttl(optional): Days before refreshing stored temperatures
+    :return: numpy array of 8760 temperatures in degF from local midnight on January 1st
+    """
+    import time
+    import numpy as np
+    lat, lon = locate(ZIP)
+    with closing(connect()) as conn, conn:
+        row = conn.execute("SELECT temp, fetched FROM hourly_local WHERE lat = ? AND lon = ? AND year = ?",
+                           (lat, lon, year)).fetchone()
+        if row is None or time.time() - row[1] >= ttl * 86400:
+            try:
+                temp = np.array(fetcher(lat, lon, year), dtype=float)
+            except Exception as error:
+                if row is None:
+                    raise Exception("No stored hourly temperatures for ZIP code " + str(ZIP) + " and can't fetch them: " + str(error))
+                # Stale temperatures are better than none
+                temp = np.frombuffer(row[0])
+            else:
+                if temp.shape != (8760,):
+                    raise Exception("Hourly temperatures must have 8760 values.")
+                conn.execute("INSERT OR REPLACE INTO hourly_local VALUES (?, ?, ?, ?, ?)",
+                             (lat, lon, year, temp.tobytes(), time.time()))
+        else:
+            temp = np.frombuffer(row[0])
+    # Fill missing hours linearly
+    valid = ~np.isnan(temp)
+    if not valid.any():
+        raise Exception("No hourly temperature data for ZIP code " + str(ZIP) + ".")
+    hours = np.arange(8760)
+    temp = np.interp(hours, hours[valid], temp[valid])
+    # Convert to degF
+    return temp * 9/5 + 32
+
+def main():
+    import sys, os
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+    for ZIP in sys.argv[1:]:
+        hourly = hourly_temperature(ZIP)
+        print(ZIP + ": " + str(round(average_temperature(ZIP), 1)) + " °F, " + str(YEAR) + " hourly " +
+              str(round(hourly.min())) + " to " + str(round(hourly.max())) + " °F")
+
+if __name__ == '__main__':
+    main()
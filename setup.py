@@ -139,6 +139,7 @@ setup(
         "easydict",
         "json5",
         "latex2mathml",
+        "matplotlib",
         "meteostat",
         "num2words",
         "numpy",